@@ -1,10 +1,6 @@
-import autogen
 from config import get_llm_config
 
 
-llm_config = get_llm_config()
-
-
 
 def setup_agents(chatprompt):
     question_system_message = """You are a professional psychological counseling assistant, with a high degree of empathy, capable of engaging in in-depth communication with users.
@@ -108,6 +104,9 @@ Please strictly follow the following JSON format for output, without any other c
     }
 }
 """
+    import autogen
+
+    llm_config = get_llm_config()
     question_agent = autogen.ConversableAgent(
         name="QuestionAgent",
         system_message=question_system_message,
@@ -1,31 +1,54 @@
-import pandas as pd
 import logging
-import autogen
 import json
 import os
-from utils import get_valid_input, categorize_score, extract_score_and_summary, extract_summary_and_updated_scores, generate_score_table, is_necessary, makerequest, parse_personal_info, extract_score, save_assessment_results, is_file_already_evaluated, custom_speaker_selection_func, generate_report
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from utils import get_valid_input, categorize_score, extract_score_and_summary, extract_summary_and_updated_scores, generate_score_table, is_necessary, makerequest, parse_personal_info, extract_score, custom_speaker_selection_func, generate_report, partial_json_string
 from agents import setup_agents
 from data_load import load_real_data
-from logging_setup import dialog_print
+from logging_setup import dialog_print, dialog_record, flush_dialog_log, DialogStream, payload
 from config import get_llm_config
 from memory import MemoryGraph
-from generate_response import generate_mock_response
+from dispatcher import DirectDispatcher
+from tracing import set_trace_context, trace_context
+from checkpoint import checkpoint_file, load_checkpoint, save_checkpoint, remove_checkpoint
+from generate_response import SimulatedPatient
+from rate_limit import LLMUnavailableError, LLMRequestRejectedError
+from work_queue import LeaseLostError
+from necessity import necessity_mode, necessity_confidence, get_necessity_classifier, record_local_decision, record_llm_decision
 
-llm_config = get_llm_config()
 logger = logging.getLogger(__name__)
+agent_runtime = os.getenv("AGENT_RUNTIME", "groupchat")
+# Interactive sessions print question and summary text as it is generated.
+stream_output = os.getenv("STREAM_OUTPUT", "1") != "0"
+# Score topic i (and run its reassessment) in the background while topic i+1 is asked.
+scoring_pipeline = os.getenv("SCORING_PIPELINE", "0") == "1"
 
 
-def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards, real_interview, scale_scores, automated=False):
+def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards, real_interview, scale_scores, automated=False, checkpoint_path=None, simulated_patient=None, check_interrupted=None):
+    if automated and simulated_patient is None:
+        simulated_patient = SimulatedPatient(real_interview, scale_scores, scale_name)
+    stm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stm")
+    pipelined = scoring_pipeline and agent_runtime != "groupchat"
+    scoring_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring") if pipelined else None
     try:
         logger.info("Starting psychological assessment task.")
         question_agent, scoring_agent, necessity_agent, summary_agent, user_proxy = agents
-        groupchat = autogen.GroupChat(
-            agents=[question_agent, scoring_agent, necessity_agent, summary_agent, user_proxy],
-            messages=[],
-            max_round=2,
-            speaker_selection_method=custom_speaker_selection_func,
-        )
-        group_chat_manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=llm_config)
+        streaming = stream_output and not automated and agent_runtime != "groupchat"
+        necessity_classifier = get_necessity_classifier(scoring_standards, scale_name)
+        if agent_runtime == "groupchat":
+            import autogen
+
+            groupchat = autogen.GroupChat(
+                agents=[question_agent, scoring_agent, necessity_agent, summary_agent, user_proxy],
+                messages=[],
+                max_round=2,
+                speaker_selection_method=custom_speaker_selection_func,
+            )
+            group_chat_manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=get_llm_config())
+        else:
+            group_chat_manager = DirectDispatcher([question_agent, scoring_agent, necessity_agent, summary_agent, user_proxy], proxy_name=user_proxy.name)
+            groupchat = group_chat_manager.groupchat
 
         total_history = []
         scores = []
@@ -36,49 +59,135 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
         qa_count = 0
         groupchat.reset()  
 
-        initial_message = (
-            f"Hello, I am your dedicated psychological assistant. I will conduct an interview with you based on {scale_name} to assess the severity of related symptoms. Please note that this is only a preliminary screening and cannot replace formal psychiatric diagnosis and treatment. "
-            "First, for the accuracy of the assessment, I would like to collect your basic information: age, gender, occupation. If you're ready, let's begin."
-        )
-        dialog_print(f"Question: {initial_message}")
-        logger.info(f"Initial message sent: {initial_message}")
-        logger.info("Initial message has been delivered to the user.")
-
-        if automated:
-            user_response = generate_mock_response(initial_message, topic=None, identification="", real_interview=real_interview, scale_scores=scale_scores, 
-                                                   scoring_standard=None, current_topic_history=None, scale_name=scale_name)
-            dialog_print(f"Simulated answer: {user_response}")
-            age, gender, occupation = parse_personal_info(user_response)
-            if age is None or gender is None or occupation is None:
-                logger.error("Unable to parse basic information in automated mode.")
-                return "Unable to parse basic information in automated mode."
+        checkpoint = load_checkpoint(checkpoint_path) if checkpoint_path else None
+        if checkpoint is not None and checkpoint.get("scale_name") != scale_name:
+            logger.warning("Ignoring checkpoint %s recorded for scale %s.", checkpoint_path, checkpoint.get('scale_name'))
+            checkpoint = None
+        completed_topics = []
+        pending = None
+
+        def request_topic_score(dispatcher, topic, topic_history):
+            topic_history_str = "\n".join([f"Q: {qa['question']}\nA: {qa['response']}" for qa in topic_history])
+            scoring_standard_str = json.dumps(scoring_standards[scale_name][topic], ensure_ascii=False, indent=2)
+            scoring_payload = f"Topic: {topic}\nHistory:\n{topic_history_str}\nStandard:\n{scoring_standard_str}"
+            total_score_text = makerequest(dispatcher, user_proxy, scoring_agent, scoring_payload)
+            if total_score_text is not None:
+                return extract_score_and_summary(total_score_text, scale_name)
+            return 0, ""
+
+        def score_in_background(dispatcher, topic, topic_history):
+            total_score, summary = request_topic_score(dispatcher, topic, topic_history)
+            memory_graph.convert_topic_to_long_term(topic, total_score, summary)
+            return total_score, summary
+
+        def record_topic_score(topic, total_score, summary):
+            dialog_print(f"\nTotal score for topic '{topic}': {total_score} points")
+            dialog_record("score", summary, topic=topic, score=total_score)
+            if summary:
+                dialog_print(f"Scoring basis: {summary}\n")
+            else:
+                print()
+            scores.append({"topic": topic, "question": "Total score", "response": "", "score": total_score})
+            completed_topics.append(topic)
+
+        def collect_pending():
+            nonlocal pending
+            if pending is not None:
+                topic, future = pending
+                pending = None
+                record_topic_score(topic, *future.result())
+
+        def check_boundary():
+            # Lets a queue worker stop once its lease is lost (check_interrupted raises).
+            if check_interrupted is not None:
+                check_interrupted()
+
+        def save_progress(pending_topic=None):
+            check_boundary()
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, {
+                    "scale_name": scale_name,
+                    "identification": identification,
+                    "completed_topics": completed_topics,
+                    "pending_topic": pending_topic,
+                    "total_history": total_history,
+                    "scores": scores,
+                    "messages": groupchat.messages,
+                    "last_question": last_question,
+                    "last_response": last_response,
+                    "qa_count": qa_count,
+                    "memory": memory_graph.to_dict()
+                })
+
+        if checkpoint is not None:
+            identification = checkpoint["identification"]
+            memory_graph = MemoryGraph.from_dict(checkpoint["memory"])
+            total_history = checkpoint["total_history"]
+            scores = checkpoint["scores"]
+            groupchat.messages.extend(checkpoint["messages"])
+            last_question = checkpoint["last_question"]
+            last_response = checkpoint["last_response"]
+            qa_count = checkpoint["qa_count"]
+            completed_topics = checkpoint["completed_topics"]
+            logger.info("Resuming assessment from checkpoint %s after %s completed topics.", checkpoint_path, len(completed_topics))
+            dialog_print(f"Resuming from checkpoint: {len(completed_topics)}/{len(topics)} topics already completed.")
+            pending_topic = checkpoint.get("pending_topic")
+            if pending_topic:
+                # Questioning finished but scoring was still in flight when the run stopped.
+                with trace_context(topic=pending_topic["topic"]):
+                    total_score, summary = request_topic_score(group_chat_manager, pending_topic["topic"], pending_topic["history"])
+                    record_topic_score(pending_topic["topic"], total_score, summary)
+                    memory_graph.convert_topic_to_long_term(pending_topic["topic"], total_score, summary)
+                save_progress()
         else:
-            while True:
-                user_response = get_valid_input("Your response (e.g., 25, male, engineer or age:25, gender:male, occupation:engineer): ")
+            initial_message = (
+                f"Hello, I am your dedicated psychological assistant. I will conduct an interview with you based on {scale_name} to assess the severity of related symptoms. Please note that this is only a preliminary screening and cannot replace formal psychiatric diagnosis and treatment. "
+                "First, for the accuracy of the assessment, I would like to collect your basic information: age, gender, occupation. If you're ready, let's begin."
+            )
+            dialog_print(f"Question: {initial_message}")
+            dialog_record("assistant", initial_message, topic=last_topic)
+            logger.info("Initial message sent: %s", payload(initial_message))
+            logger.info("Initial message has been delivered to the user.")
+
+            if automated:
+                user_response = simulated_patient.reply(initial_message, topic=None, identification="")
+                dialog_print(f"Simulated answer: {user_response}")
+                dialog_record("user", user_response, topic=last_topic)
                 age, gender, occupation = parse_personal_info(user_response)
-                if age is not None and gender is not None and occupation is not None:
-                    logger.info(f"Successfully parsed user basic information: age={age}, gender={gender}, occupation={occupation}")
-                    break
-                else:
-                    missing_fields = []
-                    if age is None:
-                        missing_fields.append("Age")
-                    if gender is None:
-                        missing_fields.append("Gender")
-                    if occupation is None:
-                        missing_fields.append("Occupation")
-                    dialog_print(f"Unable to parse your input. Please ensure it includes the following information: {', '.join(missing_fields)}. Separate items with commas, commas in Chinese enumeration, spaces, or keywords (e.g., 25, male, engineer or age:25, gender:male, occupation:engineer or 25 male engineer).")
-        identification = f"Age: {age}, Gender: {gender}, Occupation: {occupation}"
-        print(f"\nBasic information: {identification}")
-
-        memory_graph = MemoryGraph(identification)
-        total_history.append({"role": "system", "content": identification})
-        last_question = initial_message
-        last_response = user_response
+                if age is None or gender is None or occupation is None:
+                    logger.error("Unable to parse basic information in automated mode.")
+                    return "Unable to parse basic information in automated mode."
+            else:
+                while True:
+                    user_response = get_valid_input("Your response (e.g., 25, male, engineer or age:25, gender:male, occupation:engineer): ")
+                    age, gender, occupation = parse_personal_info(user_response)
+                    if age is not None and gender is not None and occupation is not None:
+                        logger.info("Successfully parsed user basic information: age=%s, gender=%s, occupation=%s", age, gender, occupation)
+                        dialog_record("user", user_response, topic=last_topic)
+                        break
+                    else:
+                        missing_fields = []
+                        if age is None:
+                            missing_fields.append("Age")
+                        if gender is None:
+                            missing_fields.append("Gender")
+                        if occupation is None:
+                            missing_fields.append("Occupation")
+                        dialog_print(f"Unable to parse your input. Please ensure it includes the following information: {', '.join(missing_fields)}. Separate items with commas, commas in Chinese enumeration, spaces, or keywords (e.g., 25, male, engineer or age:25, gender:male, occupation:engineer or 25 male engineer).")
+            identification = f"Age: {age}, Gender: {gender}, Occupation: {occupation}"
+            print(f"\nBasic information: {identification}")
+
+            memory_graph = MemoryGraph(identification)
+            total_history.append({"role": "system", "content": identification})
+            last_question = initial_message
+            last_response = user_response
 
         for idx, topic in enumerate(topics, 1):
+            if topic in completed_topics:
+                continue
+            check_boundary()
             dialog_print("\n")
-            logger.info(f"Starting topic {idx}/{len(topics)}: {topic}")
+            logger.info("Starting topic %s/%s: %s", idx, len(topics), topic)
             dialog_print(f"{'-'*20}Current Topic: {topic}")
 
             memory_graph.add_topic(topic)
@@ -88,6 +197,7 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
             current_topic_history = []
 
             while depth < max_depth:
+                set_trace_context(topic=topic, depth=depth)
                 question_type = "initial" if depth == 0 else "followup"
                 memory_context_str = memory_graph.get_context_for_prompt(topic)
                 other_topics_str = ", ".join([t for t in topics if t != topic])
@@ -102,21 +212,27 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
                     f"Memory: {memory_context_str}\n"
                     f"Other Topics: {other_topics_str}\n"
                 )
-                question = makerequest(group_chat_manager, user_proxy, question_agent, question_payload)
+                question_stream = DialogStream("Question: ") if streaming else None
+                question = makerequest(group_chat_manager, user_proxy, question_agent, question_payload, on_delta=question_stream)
                 # print(groupchat.messages)
                 if question is None:
                     question = "Sorry, I cannot generate a question at the moment."
-                dialog_print(f"Question: {question}")
-                logger.info(f"Question: {question}")
+                if question_stream is not None:
+                    question_stream.finish(question)
+                else:
+                    dialog_print(f"Question: {question}")
+                logger.info("Question: %s", payload(question))
+                dialog_record("assistant", question, topic=topic, depth=depth)
                 
                 if automated:
                     current_scoring_standard = scoring_standards[scale_name][topic]
-                    response = generate_mock_response(question, topic, identification, real_interview, scale_scores, scoring_standard=current_scoring_standard, 
-                                                      current_topic_history=current_topic_history, depth=depth, scale_name=scale_name)
+                    response = simulated_patient.reply(question, topic, identification, scoring_standard=current_scoring_standard,
+                                                      current_topic_history=current_topic_history, depth=depth)
                     dialog_print(f"\nSimulated answer: {response}")
                 else:
                     response = get_valid_input("\nAnswer: ")
-                logger.info(f"User's response: {response}")
+                logger.info("User's response: %s", payload(response))
+                dialog_record("user", response, topic=topic, depth=depth)
                 scores.append({"topic": topic, "question": question, "response": response})
 
                 group_chat_manager.groupchat.messages.append({
@@ -131,15 +247,26 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
                 current_topic_history.append({"question": question, "response": response})
                 last_question = question
                 last_response = response
-                memory_graph.add_short_term_memory(topic, response, turn_id=qa_count)
-                topic_history_str = "\n".join([f"Q: {qa['question']}\nA: {qa['response']}" for qa in current_topic_history])
-                necessity_payload = f"Topic: {topic}\nHistory:\n{topic_history_str}"
-                necessity_score_text = makerequest(group_chat_manager, user_proxy, necessity_agent, necessity_payload)
+                # STM extraction does not feed the necessity payload, so both LLM calls run
+                # concurrently and are joined before the next question is generated.
+                stm_future = stm_executor.submit(contextvars.copy_context().run, memory_graph.add_short_term_memory, topic, response, turn_id=qa_count)
+                necessity_score = local_score = confidence = None
+                if necessity_classifier is not None:
+                    local_score, confidence = necessity_classifier.classify(topic, current_topic_history)
+                    if necessity_mode == "hybrid" and confidence >= necessity_confidence:
+                        necessity_score = local_score
+                        record_local_decision(topic, local_score, confidence)
+                if necessity_score is None:
+                    topic_history_str = "\n".join([f"Q: {qa['question']}\nA: {qa['response']}" for qa in current_topic_history])
+                    necessity_payload = f"Topic: {topic}\nHistory:\n{topic_history_str}"
+                    necessity_score_text = makerequest(group_chat_manager, user_proxy, necessity_agent, necessity_payload)
+                    if necessity_score_text is not None:
+                        necessity_score = extract_score(necessity_score_text)
+                    else:
+                        necessity_score = 0
+                    record_llm_decision(topic, necessity_score, local_score, confidence)
+                stm_future.result()
 
-                if necessity_score_text is not None:
-                    necessity_score = extract_score(necessity_score_text)
-                else:
-                    necessity_score = 0
                 asked_questions += 1
                 depth += 1
                 if is_necessary(necessity_score, asked_questions):
@@ -147,24 +274,28 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
                 else:
                     break
 
-            topic_history_str = "\n".join([f"Q: {qa['question']}\nA: {qa['response']}" for qa in current_topic_history])
-            scoring_standard_str = json.dumps(scoring_standards[scale_name][topic], ensure_ascii=False, indent=2)
-            scoring_payload = f"Topic: {topic}\nHistory:\n{topic_history_str}\nStandard:\n{scoring_standard_str}"
-            total_score_text = makerequest(group_chat_manager, user_proxy, scoring_agent, scoring_payload)
-
-            if total_score_text is not None:
-                total_score, summary = extract_score_and_summary(total_score_text, scale_name)
+            set_trace_context(topic=topic, depth=None)
+            if pipelined:
+                # Topic i-1 has been scoring during this topic's questions; join it first so
+                # at most one topic is in flight and the checkpoint stays consistent.
+                collect_pending()
+                save_progress(pending_topic={"topic": topic, "history": current_topic_history})
+                future = scoring_executor.submit(contextvars.copy_context().run, score_in_background, group_chat_manager.fork(), topic, current_topic_history)
+                pending = (topic, future)
             else:
-                total_score, summary = 0, ""
+                total_score, summary = request_topic_score(group_chat_manager, topic, current_topic_history)
+                record_topic_score(topic, total_score, summary)
+                memory_graph.convert_topic_to_long_term(topic, total_score, summary)
+                save_progress()
+            # Topic boundary: the buffered transcript is written out with the checkpoint.
+            flush_dialog_log()
 
-            dialog_print(f"\nTotal score for topic '{topic}': {total_score} points")
-            if summary:
-                dialog_print(f"Scoring basis: {summary}\n")
-            else:
-                print()
-            scores.append({"topic": topic, "question": "Total score", "response": "", "score": total_score})
-            memory_graph.convert_topic_to_long_term(topic, total_score, summary)
+        if pending is not None:
+            collect_pending()
+            save_progress()
 
+        set_trace_context(topic=None, depth=None)
+        memory_graph.flush_reassessment()
         total_history_str = "\n".join(
             f"{turn['role']}: {turn['content']}" for turn in total_history
         )
@@ -179,11 +310,15 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
         final_memory_str = memory_graph.get_context_for_prompt("Overall Summary")
         summary_payload = f"Full History:\n{total_history_str}\n\nInitial Scores:\n{scores_str_for_summary_agent}\n\nMemory:\n{final_memory_str}"
 
-        summary_output = makerequest(group_chat_manager, user_proxy, summary_agent, summary_payload)
+        summary_stream = DialogStream("\nSummary: ", extract=lambda text: partial_json_string(text, "summary")) if streaming else None
+        summary_output = makerequest(group_chat_manager, user_proxy, summary_agent, summary_payload, on_delta=summary_stream)
         if summary_output is not None:
             summary, updated_scores = extract_summary_and_updated_scores(summary_output, scale_name)
         else:
             summary, updated_scores = "", {}
+        if summary_stream is not None:
+            summary_stream.finish(summary)
+        dialog_record("summary", summary)
 
         if updated_scores:
             dialog_print("\n--- Score Adjustments ---")
@@ -192,7 +327,8 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
                 reason = details["reason"]
                 memory_graph.update_topic_score(topic, score, reason)
                 dialog_print(f"Score for topic '{topic}' updated to: {score} points (reason: {reason})")
-                logger.info(f"Score for topic '{topic}' updated: -> {score} points (reason: {reason})")
+                dialog_record("score_update", reason, topic=topic, score=score)
+                logger.info("Score for topic '%s' updated: -> %s points (reason: %s)", topic, score, reason)
         else:
             logger.warning("No updated scores received.")
             dialog_print("\nNo topic scores were adjusted.")
@@ -204,12 +340,12 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
                 if attrs.get('status') == 'completed':
                     score_to_use = attrs.get('updated_score') if attrs.get('updated_score') is not None else attrs.get('score', 0)
                     if score_to_use is None:
-                        logger.warning(f"Score_to_use for topic '{topic}' is None; defaulting to 0")
+                        logger.warning("Score_to_use for topic '%s' is None; defaulting to 0", topic)
                         score_to_use = 0
                     overall_score += score_to_use
                     
         symptom_level = categorize_score(overall_score, scale_name)
-        logger.info(f"Overall score: {overall_score}, symptom level: {symptom_level}")
+        logger.info("Overall score: %s, symptom level: %s", overall_score, symptom_level)
         report_table = generate_score_table(memory_graph, topics, symptom_level)
         logger.info("Score table generation complete.")
 
@@ -219,48 +355,64 @@ def perform_assessment(topics, chatprompt, agents, scale_name, scoring_standards
         logger.info("Assessment task completed.")
         dialog_print(f"\nNumber of Q&As in this session: {qa_count}")
         return final_report, overall_score, symptom_level, updated_scores
+    except (LLMUnavailableError, LeaseLostError):
+        # Nothing is saved for this participant; its checkpoint lets a rerun resume.
+        raise
     except Exception as e:
         logger.exception("An unknown error occurred while executing the assessment task: %s", e)
         return "Sorry, an error occurred during the assessment."
+    finally:
+        stm_executor.shutdown(wait=True)
+        if scoring_executor is not None:
+            scoring_executor.shutdown(wait=True)
 
 
-def process_single_file(file_path, scoring_standards, chatprompt, selected_scale, mode_choice, csv_file_path, automated=False):
+# Saves into results_store only; the caller exports the CSV once the batch is done.
+def process_single_file(file_path, scoring_standards, chatprompt, selected_scale, mode_choice, results_store, automated=False, check_interrupted=None):
     try:
         identifier = os.path.splitext(os.path.basename(file_path))[0] 
-        if is_file_already_evaluated(identifier, csv_file_path):
-            logger.info(f"File {file_path} has already been evaluated—skipped.")
+        if results_store.is_evaluated(identifier):
+            logger.info("File %s has already been evaluated—skipped.", file_path)
             dialog_print(f"File {file_path} has already been evaluated—skipped.")
-            return 
-        logger.info(f"Starting to process file: {file_path}")
+            return True
+        logger.info("Starting to process file: %s", file_path)
         dialog_print(f"\n{'='*50}\nStarting to process file: {file_path}\n{'='*50}\n")
         identifier, real_interview, scores = load_real_data(file_path, selected_scale)
         agents = setup_agents(chatprompt)
-        if automated:
-            clear_memory_response = generate_mock_response("", topic=None, identification="", real_interview=[], scale_scores={}, clear_memory=True, scoring_standard=None, current_topic_history=None)
-            logger.info(f"API clear-memory response: {clear_memory_response}")
-            dialog_print("\nConversation memory cleared; ready to process current file.\n")
-
-        final_report, overall_score, symptom_level, updated_scores = perform_assessment(
-            topics=list(chatprompt.keys()),
-            chatprompt=chatprompt,
-            agents=agents,
-            scale_name=selected_scale,
-            scoring_standards=scoring_standards,
-            real_interview=real_interview,
-            scale_scores=scores,
-            automated=automated
-        )
+        simulated_patient = SimulatedPatient(real_interview, scores, selected_scale) if automated else None
 
-        save_assessment_results(
-            identifier=identifier,
-            overall_score=overall_score,
-            symptom_level=symptom_level,
-            updated_scores=updated_scores,
-            csv_file=csv_file_path,
-            scale_name=selected_scale
-        )
-        logger.info(f"Assessment results saved to {csv_file_path}")
-        dialog_print(f"Assessment results saved to {csv_file_path}")
+        with trace_context(participant=identifier):
+            final_report, overall_score, symptom_level, updated_scores = perform_assessment(
+                topics=list(chatprompt.keys()),
+                chatprompt=chatprompt,
+                agents=agents,
+                scale_name=selected_scale,
+                scoring_standards=scoring_standards,
+                real_interview=real_interview,
+                scale_scores=scores,
+                automated=automated,
+                checkpoint_path=checkpoint_file(identifier),
+                simulated_patient=simulated_patient,
+                check_interrupted=check_interrupted
+            )
+
+        if check_interrupted is not None:
+            check_interrupted()
+        try:
+            results_store.save(
+                identifier=identifier,
+                overall_score=overall_score,
+                symptom_level=symptom_level,
+                updated_scores=updated_scores
+            )
+        except OSError as e:
+            # The checkpoint is only removed once the result is on disk.
+            logger.error("Could not save results for %s to %s; its checkpoint is kept for a rerun: %s", identifier, results_store.path, e)
+            dialog_print(f"Error saving results for {file_path}; check logs for details.")
+            return False
+        remove_checkpoint(checkpoint_file(identifier))
+        logger.info("Assessment results saved to %s", results_store.path)
+        dialog_print(f"Assessment results saved to {results_store.path}")
 
         if mode_choice == "2":
             dialog_print("\nAutomated test completed. Psychological screening report:\n")
@@ -268,9 +420,23 @@ def process_single_file(file_path, scoring_standards, chatprompt, selected_scale
             dialog_print("\nThank you for your candid participation. Below is your preliminary psychological screening report. "
                 "The results are for reference only and do not constitute a medical diagnosis. Generating the report may take a while—please wait.\n")
         dialog_print(final_report)
+        dialog_record("report", final_report)
         logger.info("Psychological assessment report delivered; program ended.")
+        return True
 
+    except LeaseLostError as e:
+        logger.warning("Stopped processing %s: %s; another worker may hold it now.", file_path, e)
+        return False
+    except LLMRequestRejectedError as e:
+        logger.error("LLM endpoint rejected a request while processing %s; check the model, base_url and api_key. No results saved: %s", file_path, e)
+        dialog_print(f"LLM endpoint rejected a request; {file_path} was not scored, check the logs.")
+        return False
+    except LLMUnavailableError as e:
+        logger.error("LLM endpoint unavailable while processing %s; no results saved, a rerun resumes from its checkpoint: %s", file_path, e)
+        dialog_print(f"LLM endpoint unavailable; {file_path} was not scored and will resume from its checkpoint.")
+        return False
     except Exception as e:
-        logger.exception(f"Error processing file {file_path}: {e}")
+        logger.exception("Error processing file %s: %s", file_path, e)
         dialog_print(f"Error processing file {file_path}; check logs for details.")
+        return False
 
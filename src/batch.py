@@ -0,0 +1,142 @@
+import os
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from assessment import process_single_file
+from logging_setup import dialog_print, initialize_session_dialog_log, close_session_dialog_log
+from results import ResultsStore
+from work_queue import LeaseKeeper, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+def participant_id(json_file):
+    return os.path.splitext(os.path.basename(json_file))[0]
+
+
+# Stable across machines and Python versions (unlike hash()), so every node running
+# --shard i/N with the same N agrees on the partition without coordination.
+def shard_of(identifier, num_shards):
+    return int(hashlib.sha1(str(identifier).encode("utf-8")).hexdigest(), 16) % num_shards
+
+
+def shard_output_path(csv_file, shard_index, num_shards):
+    root, ext = os.path.splitext(csv_file)
+    return f"{root}.shard-{shard_index}-of-{num_shards}{ext}"
+
+
+def select_participants(json_files, shard=None, limit=None, ids=None):
+    selected = sorted(json_files, key=participant_id)
+    if ids:
+        wanted = set(ids)
+        selected = [f for f in selected if participant_id(f) in wanted]
+        missing = wanted - {participant_id(f) for f in selected}
+        if missing:
+            logger.warning("Requested participants not found: %s", ", ".join(sorted(missing)))
+    if shard is not None:
+        shard_index, num_shards = shard
+        selected = [f for f in selected if shard_of(participant_id(f), num_shards) == shard_index]
+    if limit is not None:
+        selected = selected[:limit]
+    return selected
+
+
+def _run_participant(json_file, scoring_standards, chatprompt, selected_scale, mode_choice, automated, results_store):
+    identifier = participant_id(json_file)
+    if results_store.is_evaluated(identifier):
+        logger.info("File %s has already been evaluated—skipped.", json_file)
+        return
+    initialize_session_dialog_log(identifier)
+    try:
+        process_single_file(json_file, scoring_standards, chatprompt, selected_scale, mode_choice, results_store, automated)
+    finally:
+        close_session_dialog_log()
+
+
+def _drain_queue(queue, worker, scoring_standards, chatprompt, selected_scale, mode_choice, automated, results_store, session_logs):
+    # Claims participants until none are pending. The lease is renewed in the background
+    # for as long as the session runs, and released as done or failed afterwards.
+    processed = 0
+    while True:
+        task = queue.claim(worker)
+        if task is None:
+            return processed
+        identifier, json_file, attempt = task
+        logger.info("%s claimed %s (attempt %s/%s).", worker, identifier, attempt, queue.max_attempts)
+        if session_logs:
+            initialize_session_dialog_log(identifier)
+        keeper = LeaseKeeper(queue, identifier, worker)
+        try:
+            with keeper:
+                succeeded = process_single_file(json_file, scoring_standards, chatprompt, selected_scale, mode_choice, results_store, automated, check_interrupted=keeper.check)
+        except Exception as e:
+            succeeded = False
+            logger.exception("Worker %s failed on %s: %s", worker, identifier, e)
+        finally:
+            if session_logs:
+                close_session_dialog_log()
+        if keeper.lost:
+            # The task is no longer ours to complete or fail; its new holder reports it.
+            logger.warning("%s dropped %s after losing its lease.", worker, identifier)
+        elif succeeded:
+            queue.complete(identifier, worker)
+        else:
+            queue.fail(identifier, worker, "assessment failed; see the worker log")
+        processed += 1
+
+
+def run_queue(queue, json_files, scoring_standards, chatprompt, selected_scale, mode_choice, csv_file_path, automated=False, concurrency=1):
+    results_store = ResultsStore.for_csv(csv_file_path)
+    start_time = time.perf_counter()
+    tasks = [(participant_id(json_file), json_file) for json_file in json_files]
+    queue.enqueue(tasks, done=[identifier for identifier, _ in tasks if results_store.is_evaluated(identifier)])
+
+    worker = worker_name()
+    if concurrency <= 1:
+        processed = _drain_queue(queue, worker, scoring_standards, chatprompt, selected_scale, mode_choice, automated, results_store, False)
+    else:
+        logger.info("Draining %s with %s concurrent workers.", queue.path, concurrency)
+        dialog_print(f"Draining {queue.path} with {concurrency} concurrent workers; per-participant dialogs are written to dialog_logs/.")
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(_drain_queue, queue, f"{worker}/{index}", scoring_standards, chatprompt, selected_scale, mode_choice, automated, results_store, True)
+                for index in range(concurrency)
+            ]
+            processed = sum(future.result() for future in futures)
+
+    exported = results_store.export_csv(csv_file_path)
+    dialog_print(f"Exported {exported} results to {csv_file_path}")
+
+    elapsed = time.perf_counter() - start_time
+    logger.info("%s processed %s queued participants in %.1fs (concurrency=%s).", worker, processed, elapsed, concurrency)
+    dialog_print(f"Processed {processed} queued participants in {elapsed:.1f}s.")
+
+
+def run_batch(json_files, scoring_standards, chatprompt, selected_scale, mode_choice, csv_file_path, automated=False, concurrency=1):
+    results_store = ResultsStore.for_csv(csv_file_path)
+    start_time = time.perf_counter()
+
+    if concurrency <= 1:
+        for json_file in json_files:
+            process_single_file(json_file, scoring_standards, chatprompt, selected_scale, mode_choice, results_store, automated)
+    else:
+        logger.info("Running %s participants with %s concurrent workers.", len(json_files), concurrency)
+        dialog_print(f"Running {len(json_files)} participants with {concurrency} concurrent workers; per-participant dialogs are written to dialog_logs/.")
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(_run_participant, json_file, scoring_standards, chatprompt, selected_scale, mode_choice, automated, results_store): json_file
+                for json_file in json_files
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.exception("Worker failed on file %s: %s", futures[future], e)
+
+    exported = results_store.export_csv(csv_file_path)
+    dialog_print(f"Exported {exported} results to {csv_file_path}")
+
+    elapsed = time.perf_counter() - start_time
+    logger.info("Batch of %s files finished in %.1fs (concurrency=%s).", len(json_files), elapsed, concurrency)
+    dialog_print(f"Batch of {len(json_files)} files finished in {elapsed:.1f}s.")
@@ -0,0 +1,75 @@
+# Per-call overhead of makerequest through the GroupChatManager path versus the
+# DirectDispatcher path. Agents reply with canned text, so no endpoint is needed.
+# Run from src/: python -m benchmarks.bench_dispatch --calls 200
+import argparse
+import logging
+import statistics
+import time
+import autogen
+from utils import makerequest, custom_speaker_selection_func
+from dispatcher import DirectDispatcher
+
+
+def _canned_agent(name, reply):
+    agent = autogen.ConversableAgent(name=name, llm_config=False, human_input_mode="NEVER")
+    agent.register_reply([autogen.Agent, None], lambda recipient, messages, sender, config: (True, reply), position=0)
+    return agent
+
+
+def _build_agents():
+    question_agent = _canned_agent("QuestionAgent", "That sounds hard. How often has this happened over the past two weeks?")
+    scoring_agent = _canned_agent("ScoringAgent", '{"score": 1, "summary": "Several days."}')
+    necessity_agent = _canned_agent("NecessityAgent", "1")
+    summary_agent = _canned_agent("SummaryAgent", '{"summary": "", "updated_scores": {}}')
+    user_proxy = autogen.UserProxyAgent(name="UserProxy", human_input_mode="NEVER", code_execution_config=False, llm_config=False)
+    return [question_agent, scoring_agent, necessity_agent, summary_agent, user_proxy]
+
+
+def _groupchat_runtime(agents):
+    groupchat = autogen.GroupChat(agents=agents, messages=[], max_round=2, speaker_selection_method=custom_speaker_selection_func)
+    return autogen.GroupChatManager(groupchat=groupchat, llm_config=False)
+
+
+def _direct_runtime(agents):
+    return DirectDispatcher(agents, proxy_name=agents[-1].name)
+
+
+def run(runtime_factory, calls):
+    agents = _build_agents()
+    manager = runtime_factory(agents)
+    user_proxy = agents[-1]
+    targets = agents[:3]
+    timings = []
+    for i in range(calls):
+        agent = targets[i % len(targets)]
+        start = time.perf_counter()
+        reply = makerequest(manager, user_proxy, agent, f"Topic: Sleep Problems\nHistory:\nQ: question {i}\nA: answer {i}")
+        timings.append(time.perf_counter() - start)
+        # makerequest returns None on any error, which would time the exception path.
+        if reply is None:
+            raise SystemExit(f"{agent.name} returned no reply on call {i}; the benchmark is not measuring dispatch.")
+        manager.groupchat.messages.append({"content": f"answer {i}", "role": "user", "name": "UserProxy"})
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare makerequest overhead across agent runtimes.")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = {
+        "groupchat": run(_groupchat_runtime, args.calls),
+        "direct": run(_direct_runtime, args.calls),
+    }
+    print(f"{'runtime':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, timings in results.items():
+        timings_ms = sorted(t * 1000 for t in timings)
+        p95 = timings_ms[int(0.95 * (len(timings_ms) - 1))]
+        print(f"{name:<10} {statistics.mean(timings_ms):>9.3f} {statistics.median(timings_ms):>9.3f} {p95:>9.3f}")
+    speedup = statistics.mean(results["groupchat"]) / statistics.mean(results["direct"])
+    print(f"Direct dispatch is {speedup:.1f}x faster per call.")
+
+
+if __name__ == "__main__":
+    main()
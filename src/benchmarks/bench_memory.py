@@ -0,0 +1,74 @@
+# MemoryGraph on the native backend versus networkx: one simulated participant (topics,
+# statements, prompt contexts, score updates and a checkpoint round trip) repeated, plus
+# the cost of importing networkx. Extraction and reassessment are stubbed out, so no
+# endpoint is needed.
+# Run from src/: python -m benchmarks.bench_memory --participants 200
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import time
+from memory import MemoryGraph
+from memory_backend import MEMORY_BACKENDS
+
+TOPICS = ["Loss of Interest", "Depressed Mood", "Sleep Problems", "Fatigue or Low Energy", "Appetite or Weight Changes",
+          "Low Self-Worth", "Concentration Difficulties", "Psychomotor Changes"]
+
+
+def run_participant(backend, statements_per_topic):
+    memory = MemoryGraph("age:30, gender:female, occupation:teacher", reassessment_policy="before_summary", backend=backend)
+    memory.extract_key_info = lambda response, topic: "Emotion: sadness; Frequency: often; Symptom: fatigue"
+    turn = 0
+    for topic in TOPICS:
+        memory.add_topic(topic)
+        for _ in range(statements_per_topic):
+            memory.get_context_for_prompt(topic)
+            turn += 1
+            memory.add_short_term_memory(topic, "I have felt tired most days.", turn_id=turn)
+        memory.convert_topic_to_long_term(topic, 1, "Several days of symptoms.")
+        MemoryGraph.from_dict(json.loads(json.dumps(memory.to_dict())), reassessment_policy="before_summary", backend=backend)
+    for topic in TOPICS:
+        memory.update_topic_score(topic, 2, "Adjusted after review.")
+    memory.get_context_for_prompt("Overall Summary")
+
+
+def time_backend(backend, participants, statements_per_topic):
+    run_participant(backend, statements_per_topic)
+    start = time.perf_counter()
+    for _ in range(participants):
+        run_participant(backend, statements_per_topic)
+    return (time.perf_counter() - start) / participants
+
+
+def import_time(module):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return float(result.stdout) if result.returncode == 0 else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark of the MemoryGraph backends.")
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--statements", type=int, default=3, help="Statements per topic.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    for backend in MEMORY_BACKENDS:
+        try:
+            results[backend] = time_backend(backend, args.participants, args.statements)
+        except ImportError as e:
+            print(f"{backend}: skipped ({e})")
+    print(f"{'backend':<10} {'ms/participant':>15}")
+    for backend, seconds in results.items():
+        print(f"{backend:<10} {seconds * 1000:>15.3f}")
+    if len(results) == 2:
+        print(f"Speed-up: {results['networkx'] / results['native']:.1f}x")
+    for module in ("memory_backend", "networkx"):
+        seconds = import_time(module)
+        print(f"import {module}: {'unavailable' if seconds is None else f'{seconds * 1000:.1f} ms'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Simulated-patient prompt size with PATIENT_CONTEXT=full versus retrieval, and score
+# agreement between two result CSVs produced from the same participants with each mode.
+#
+# Run from src/:
+#   python -m benchmarks.bench_retrieval --data-dir ../data/processed_train_daic_woz
+#   python -m benchmarks.bench_retrieval --participants 20 --top-k 4     # synthetic transcripts
+#   python -m benchmarks.bench_retrieval --compare full.csv retrieval.csv
+import argparse
+import csv
+import glob
+import logging
+import os
+import time
+from benchmarks.fake_server import _count_tokens
+from benchmarks.synthetic import make_participant
+from data_load import load_chatprompt, load_real_data
+from generate_response import SimulatedPatient, build_patient_prompt
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES_DIR = os.path.join(SRC_DIR, "..", "scales")
+BASIC_INFO_QUESTION = "First, for the accuracy of the assessment, I would like to collect your basic information: age, gender, occupation."
+
+
+def load_participants(args):
+    if args.data_dir:
+        files = sorted(glob.glob(os.path.join(args.data_dir, "*.json")))[:args.participants or None]
+        return [load_real_data(path, args.scale)[:2] for path in files]
+    return [make_participant(index, turns=args.turns, seed=args.seed)[:2] for index in range(args.participants or 10)]
+
+
+def prompt_tokens(patient, question, topic, identification):
+    prompt = build_patient_prompt(question, identification)
+    if patient.index is not None:
+        prompt = f"Relevant excerpts from your interview dialogue:\n{patient.excerpts(question, topic, identification)}\n{prompt}"
+    return _count_tokens(patient.system_prompt) + _count_tokens(prompt)
+
+
+def measure_tokens(participants, chatprompt, top_k):
+    totals = {"full": 0, "retrieval": 0}
+    calls = 0
+    build_time = 0.0
+    for _, real_interview in participants:
+        full = SimulatedPatient(real_interview, context="full")
+        start = time.perf_counter()
+        retrieval = SimulatedPatient(real_interview, context="retrieval", top_k=top_k)
+        build_time += time.perf_counter() - start
+        questions = [(BASIC_INFO_QUESTION, None, "")]
+        questions += [(question, topic, "known") for topic, topic_questions in chatprompt.items() for question in topic_questions]
+        for question, topic, identification in questions:
+            totals["full"] += prompt_tokens(full, question, topic, identification)
+            totals["retrieval"] += prompt_tokens(retrieval, question, topic, identification)
+            calls += 1
+    return totals, calls, build_time
+
+
+def _read_results(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return {row["identifier"].strip(): row for row in csv.DictReader(f) if row.get("identifier")}
+
+
+def compare_results(path_a, path_b):
+    rows_a, rows_b = _read_results(path_a), _read_results(path_b)
+    shared = sorted(set(rows_a) & set(rows_b))
+    if not shared:
+        print("No participants in common.")
+        return
+    item_columns = [column for column in rows_a[shared[0]] if column.startswith("item")]
+    total_error = 0.0
+    class_matches = item_matches = item_within_one = item_count = 0
+    for identifier in shared:
+        a, b = rows_a[identifier], rows_b[identifier]
+        total_error += abs(float(a["total"]) - float(b["total"]))
+        class_matches += a["classes"] == b["classes"]
+        for column in item_columns:
+            if column not in b or a[column] in ("", None) or b[column] in ("", None):
+                continue
+            diff = abs(float(a[column]) - float(b[column]))
+            item_matches += diff == 0
+            item_within_one += diff <= 1
+            item_count += 1
+    print(f"Participants compared: {len(shared)} (only in A: {len(set(rows_a) - set(rows_b))}, only in B: {len(set(rows_b) - set(rows_a))})")
+    print(f"Total score MAE:       {total_error / len(shared):.2f}")
+    print(f"Severity class match:  {class_matches / len(shared):.1%}")
+    if item_count:
+        print(f"Item exact match:      {item_matches / item_count:.1%}")
+        print(f"Item within one point: {item_within_one / item_count:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token savings and score agreement of retrieval-based patient prompts.")
+    parser.add_argument("--data-dir", help="Directory of participant JSON files; synthetic transcripts are used if omitted.")
+    parser.add_argument("--scale", default="PHQ-8")
+    parser.add_argument("--participants", type=int, default=0, help="Limit on participants (0 = all files, or 10 synthetic).")
+    parser.add_argument("--turns", type=int, default=300, help="Transcript turns per synthetic participant.")
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs=2, metavar=("FULL_CSV", "RETRIEVAL_CSV"), help="Report score agreement between two result CSVs.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    chatprompt = load_chatprompt(os.path.join(SCALES_DIR, f"{args.scale}.json"))
+    participants = load_participants(args)
+    totals, calls, build_time = measure_tokens(participants, chatprompt, args.top_k)
+    saved = 1 - totals["retrieval"] / totals["full"] if totals["full"] else 0.0
+    print(f"Participants: {len(participants)}, patient calls: {calls}, top-k: {args.top_k}")
+    print(f"{'mode':<10} {'prompt tokens':>14} {'per call':>10}")
+    for mode in ("full", "retrieval"):
+        print(f"{mode:<10} {totals[mode]:>14} {totals[mode] / calls:>10.0f}")
+    print(f"Prompt tokens saved: {saved:.1%}; index build {build_time * 1000 / len(participants):.1f} ms/participant")
+
+
+if __name__ == "__main__":
+    main()
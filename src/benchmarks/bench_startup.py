@@ -0,0 +1,75 @@
+# Cold-start import cost of main.py, measured with `python -X importtime` in a fresh
+# interpreter: the cumulative total, the heaviest imports main makes, and which of the
+# heavy third-party packages were pulled in before any work started.
+# Run from src/: python -m benchmarks.bench_startup --runs 5 --budget-ms 300
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("autogen", "openai", "httpx", "pandas", "numpy", "networkx", "tiktoken")
+
+
+def import_profile(module):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=SRC_DIR)
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    # "import time: self [us] | cumulative | imported package"; nesting is shown by indentation.
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        entries.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize(entries, module):
+    total_us = next((cumulative for name, _, cumulative in entries if name.strip() == module), 0)
+    loaded = {name.strip().split(".")[0] for name, _, _ in entries}
+    # Children are printed before their parent, one level (two spaces) deeper, so the
+    # module's direct imports are the depth-1 entries since the previous top-level one.
+    direct, block = [], []
+    for name, _, cumulative in entries:
+        depth = len(name) - len(name.lstrip())
+        if depth == 0:
+            if name == module:
+                direct = block
+            block = []
+        elif depth == 2:
+            block.append((name.strip(), cumulative))
+    return total_us, loaded, direct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of the entry point.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Heaviest direct imports to list.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Exit non-zero if the median exceeds this.")
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total_us, loaded, direct = summarize(import_profile(args.module), args.module)
+        totals.append(total_us / 1000)
+    median_ms = statistics.median(totals)
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs (min {min(totals):.1f}, max {max(totals):.1f})")
+    print(f"\nHeaviest imports made by {args.module} (last run):")
+    for name, cumulative in sorted(direct, key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    print("\nHeavy dependencies loaded at startup:")
+    for name in HEAVY_MODULES:
+        print(f"  {name:<10} {'yes' if name in loaded else 'no'}")
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"\nOver budget: {median_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
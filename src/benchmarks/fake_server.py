@@ -0,0 +1,214 @@
+# Local OpenAI-compatible stand-in for benchmarking. It answers /v1/chat/completions
+# with canned, schema-valid replies for every stage of the pipeline and sleeps
+# according to a configurable latency distribution.
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Matched against the system prompt, first hit wins.
+STAGE_MARKERS = [
+    ("question", "professional psychological counseling assistant"),
+    ("necessity", "strictly evaluate whether further questioning is needed"),
+    ("scoring", "professional psychological scale scorer"),
+    ("summary", "senior psychological consultation summary expert"),
+    ("patient", "you are the client in this conversation"),
+    ("extraction", "Extract key information strictly as instructed"),
+    ("reassessment", "performing a file review"),
+]
+STAGES = [stage for stage, _ in STAGE_MARKERS] + ["other"]
+
+
+def classify(messages):
+    system_prompt = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    for stage, marker in STAGE_MARKERS:
+        if marker in system_prompt:
+            return stage
+    return "other"
+
+
+def parse_latency(spec):
+    # "fixed:0.2", "uniform:0.1:0.5" or "lognormal:<mu>:<sigma>" (seconds)
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda rng: args[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(args[0], args[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'.")
+
+
+_token_counter = None
+
+
+def token_counter():
+    # (name, count) resolved once per process. tiktoken fetches its BPE files on first
+    # use, which fails offline with a network error rather than ImportError, so any
+    # failure selects the length estimate instead of crashing every request.
+    global _token_counter
+    if _token_counter is None:
+        try:
+            from autogen.token_count_utils import count_token
+            count_token("probe")
+            _token_counter = ("tiktoken", count_token)
+        except Exception:
+            _token_counter = ("length", lambda text: max(1, len(text) // 4))
+    return _token_counter
+
+
+def _count_tokens(text):
+    return token_counter()[1](text)
+
+
+def _last_user_content(messages):
+    return next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+
+
+def canned_reply(stage, messages, rng):
+    prompt = _last_user_content(messages)
+    if stage == "question":
+        return "Thank you for sharing that with me. Over the past two weeks, how often has this been bothering you?"
+    if stage == "necessity":
+        return str(rng.choice([0, 1, 1, 2]))
+    if stage == "scoring":
+        return json.dumps({"score": rng.randint(0, 3), "summary": "The user reports the symptom on several days."})
+    if stage == "summary":
+        scores_match = re.search(r"Initial Scores:\n(.*)", prompt)
+        updated_scores = {}
+        if scores_match:
+            for item in scores_match.group(1).split(", "):
+                topic, _, score = item.rpartition(":")
+                if topic and score.strip().isdigit():
+                    updated_scores[topic] = {"score": int(score), "reason": "Consistent with the dialogue."}
+        return json.dumps({"summary": "The user reports mild symptoms; continued self-monitoring is recommended.", "updated_scores": updated_scores})
+    if stage == "patient":
+        if "age:<age>" in prompt:
+            return "age:35, gender:female, occupation:teacher"
+        return "I have felt tired and a bit down on most days for about two weeks, and it affects my work."
+    if stage == "extraction":
+        return json.dumps({"entities": {"Emotion": ["sadness"], "Frequency": ["most days"], "Symptom": ["fatigue"], "Duration": ["two weeks"], "Impact": ["work"]}, "summary": ""})
+    if stage == "reassessment":
+        return json.dumps({"results": []})
+    return "OK"
+
+
+class FakeLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0", stage_latency=None, seed=0):
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.set_latency(latency, stage_latency)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def set_latency(self, latency, stage_latency=None):
+        self._default_latency = parse_latency(latency)
+        self._stage_latency = {stage: parse_latency(spec) for stage, spec in (stage_latency or {}).items()}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.calls = defaultdict(int)
+            self.prompt_tokens = defaultdict(int)
+            self.completion_tokens = defaultdict(int)
+            self.simulated_latency = defaultdict(float)
+
+    def snapshot(self):
+        with self._stats_lock:
+            return {
+                "calls": dict(self.calls),
+                "prompt_tokens": dict(self.prompt_tokens),
+                "completion_tokens": dict(self.completion_tokens),
+                "simulated_latency": dict(self.simulated_latency),
+            }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def complete(self, body):
+        messages = body.get("messages", [])
+        stage = classify(messages)
+        with self._rng_lock:
+            content = canned_reply(stage, messages, self._rng)
+            delay = max(0.0, self._stage_latency.get(stage, self._default_latency)(self._rng))
+        prompt_tokens = sum(_count_tokens(m.get("content") or "") for m in messages)
+        completion_tokens = _count_tokens(content)
+        with self._stats_lock:
+            self.calls[stage] += 1
+            self.prompt_tokens[stage] += prompt_tokens
+            self.completion_tokens[stage] += completion_tokens
+            self.simulated_latency[stage] += delay
+        if delay:
+            time.sleep(delay)
+        return {
+            "id": f"chatcmpl-fake-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"Unsupported path {self.path}"}})
+                    return
+                completion = server.complete(body)
+                if body.get("stream"):
+                    self._send_stream(completion)
+                else:
+                    self._send(200, completion)
+
+            def _send_stream(self, completion):
+                # Server-sent events, one chunk per word, terminated by [DONE].
+                content = completion["choices"][0]["message"]["content"]
+                base = {key: completion[key] for key in ("id", "created", "model")}
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for piece in re.findall(r"\S+\s*|\s+", content):
+                    chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                done = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.close_connection = True
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,186 @@
+# Offline end-to-end benchmark: drives assessment.perform_assessment over synthetic
+# participants against the local fake server and reports calls and prompt tokens per
+# stage, end-to-end latency percentiles and pure-Python overhead.
+#
+# Run from src/:
+#   python -m benchmarks.run_suite --participants 20 --latency lognormal:-1.5:0.4
+#   python -m benchmarks.run_suite --save-baseline      # record benchmarks/baseline.json
+#   python -m benchmarks.run_suite --check              # fail on regressions against it
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from benchmarks.fake_server import FakeLLMServer, STAGES, token_counter
+from benchmarks.synthetic import make_participant
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES_DIR = os.path.join(SRC_DIR, "..", "scales")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Metrics compared against the baseline. Latency percentiles and the pure-Python
+# overhead are wall-clock times that depend on the host and its load, so they are
+# reported only.
+GATED_METRICS = ("calls_per_participant", "prompt_tokens_per_participant")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def configure_environment(base_url):
+    # Must run before any project module is imported: they read these at import time.
+    os.environ["API_BASE_URL"] = base_url
+    os.environ["API_KEY"] = "fake-key"
+    os.environ["LLM_CACHE"] = "0"
+    os.environ["OAI_CONFIG_LIST"] = json.dumps([{
+        "model": "qwen2.5-72b",
+        "api_key": "fake-key",
+        "base_url": base_url,
+        "tags": ["qwen2.5-72b", "local"],
+        "price": [0, 0]
+    }])
+
+
+def disable_agent_cache():
+    # Every agent shares the cached config dict, so one edit before setup_agents covers them all.
+    from config import get_llm_config
+    get_llm_config()["cache_seed"] = None
+
+
+def run_participants(server, participants, turns, seed):
+    from agents import setup_agents
+    from assessment import perform_assessment
+    from data_load import load_chatprompt, load_scoring_standards
+
+    chatprompt = load_chatprompt(os.path.join(SCALES_DIR, "PHQ-8.json"))
+    scoring_standards = load_scoring_standards(os.path.join(SCALES_DIR, "scoring_standards.json"))
+    topics = list(chatprompt.keys())
+
+    durations = []
+    server.reset_stats()
+    for index in range(participants):
+        _, real_interview, scale_scores = make_participant(index, turns=turns, seed=seed)
+        agents = setup_agents(chatprompt)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = perform_assessment(topics, chatprompt, agents, "PHQ-8", scoring_standards, real_interview, scale_scores, automated=True)
+        durations.append(time.perf_counter() - start)
+        if isinstance(result, str):
+            raise RuntimeError(f"Assessment failed for synthetic participant {index}: {result}")
+    return durations, server.snapshot()
+
+
+def build_report(durations, stats, overhead_durations, participants, args):
+    def per_participant(counter):
+        values = {stage: counter.get(stage, 0) / participants for stage in STAGES if counter.get(stage)}
+        values["total"] = sum(counter.values()) / participants
+        return values
+
+    return {
+        "config": {"participants": participants, "turns": args.turns, "latency": args.latency, "seed": args.seed,
+                   "token_counter": token_counter()[0]},
+        "calls_per_participant": per_participant(stats["calls"]),
+        "prompt_tokens_per_participant": per_participant(stats["prompt_tokens"]),
+        "completion_tokens_per_participant": per_participant(stats["completion_tokens"]),
+        "latency_s": {
+            "p50": percentile(durations, 50),
+            "p90": percentile(durations, 90),
+            "p95": percentile(durations, 95),
+            "max": max(durations),
+        },
+        "overhead_ms_per_participant": {"total": 1000 * sum(overhead_durations) / len(overhead_durations)},
+    }
+
+
+def print_report(report):
+    print(f"\n{'stage':<14} {'calls/part':>11} {'prompt tok/part':>16} {'compl tok/part':>15}")
+    for stage in STAGES + ["total"]:
+        calls = report["calls_per_participant"].get(stage)
+        if not calls:
+            continue
+        print(f"{stage:<14} {calls:>11.1f} {report['prompt_tokens_per_participant'].get(stage, 0):>16.0f} "
+              f"{report['completion_tokens_per_participant'].get(stage, 0):>15.0f}")
+    latency = report["latency_s"]
+    print(f"\nEnd-to-end per participant: p50 {latency['p50']:.2f}s, p90 {latency['p90']:.2f}s, p95 {latency['p95']:.2f}s, max {latency['max']:.2f}s")
+    print(f"Pure-Python overhead per participant: {report['overhead_ms_per_participant']['total']:.0f} ms")
+
+
+def check_regressions(report, baseline, tolerance):
+    regressions = []
+    metrics = GATED_METRICS
+    baseline_counter = baseline.get("config", {}).get("token_counter")
+    if baseline_counter and baseline_counter != report["config"]["token_counter"]:
+        # tiktoken counts and the length estimate are not comparable.
+        print(f"\nBaseline counted tokens with {baseline_counter}, this run with {report['config']['token_counter']}; prompt tokens not checked.")
+        metrics = tuple(metric for metric in GATED_METRICS if metric != "prompt_tokens_per_participant")
+    for metric in metrics:
+        for key, expected in baseline.get(metric, {}).items():
+            current = report[metric].get(key, 0)
+            if current > expected * (1 + tolerance):
+                regressions.append(f"{metric}.{key}: {current:.1f} > baseline {expected:.1f} (+{tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the assessment pipeline.")
+    parser.add_argument("--participants", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=120, help="Transcript turns per synthetic participant.")
+    parser.add_argument("--latency", default="fixed:0.05", help="fixed:<s> | uniform:<lo>:<hi> | lognormal:<mu>:<sigma>")
+    parser.add_argument("--stage-latency", action="append", default=[], metavar="STAGE=SPEC", help="Per-stage latency override.")
+    parser.add_argument("--overhead-participants", type=int, default=3, help="Zero-latency runs used to measure pure-Python overhead.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if gated metrics regress against the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--json", dest="json_out", help="Also write the report to this file.")
+    args = parser.parse_args()
+
+    stage_latency = dict(item.split("=", 1) for item in args.stage_latency)
+    server = FakeLLMServer(latency=args.latency, stage_latency=stage_latency, seed=args.seed).start()
+    configure_environment(server.base_url)
+    logging.disable(logging.CRITICAL)
+    disable_agent_cache()
+
+    try:
+        durations, stats = run_participants(server, args.participants, args.turns, args.seed)
+        server.set_latency("fixed:0")
+        overhead_durations, _ = run_participants(server, args.overhead_participants, args.turns, args.seed)
+    finally:
+        server.stop()
+
+    report = build_report(durations, stats, overhead_durations, args.participants, args)
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({metric: report[metric] for metric in ("config",) + GATED_METRICS}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; record one with --save-baseline.")
+            sys.exit(2)
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = check_regressions(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
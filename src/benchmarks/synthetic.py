@@ -0,0 +1,40 @@
+# Synthetic DAIC-WOZ style participants, in the same shape that data_load.load_real_data returns.
+import random
+
+ELLIE_PROMPTS = [
+    "how are you doing today",
+    "where are you from originally",
+    "what do you do to relax",
+    "how easy is it for you to get a good night's sleep",
+    "have you been diagnosed with depression",
+    "how have you been feeling lately",
+    "what are you most proud of in your life",
+    "when was the last time you felt really happy",
+    "how do you usually handle stress",
+    "tell me about your relationship with your family",
+]
+PARTICIPANT_REPLIES = [
+    "i'm doing okay i guess",
+    "i've been pretty tired lately and i don't sleep that well",
+    "i like to go hiking on weekends when i have the energy",
+    "not really no",
+    "sometimes i feel down for a few days and then it passes",
+    "work has been stressful and i can't really concentrate",
+    "my appetite has been kind of off for a couple of weeks",
+    "i'm proud of my kids",
+    "uh maybe a month ago when i saw my friends",
+    "i just try to keep busy",
+]
+PHQ8_ITEMS = ["PHQ8_NoInterest", "PHQ8_Depressed", "PHQ8_Sleep", "PHQ8_Tired", "PHQ8_Appetite", "PHQ8_Failure", "PHQ8_Concentrating", "PHQ8_Moving"]
+
+
+def make_participant(index, turns=120, seed=0):
+    rng = random.Random(seed * 100003 + index)
+    real_interview = []
+    for _ in range(turns // 2):
+        real_interview.append({"roleName": "Ellie", "content": rng.choice(ELLIE_PROMPTS)})
+        real_interview.append({"roleName": "Participant", "content": rng.choice(PARTICIPANT_REPLIES)})
+    items = {item: rng.randint(0, 3) for item in PHQ8_ITEMS}
+    total = sum(items.values())
+    scores = {"PHQ8_Score": total, "PHQ8_Binary": int(total >= 10), "items": items}
+    return f"synthetic_{index}", real_interview, scores
@@ -0,0 +1,42 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+checkpoint_dir = os.getenv("CHECKPOINT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints"))
+
+
+def checkpoint_file(identifier):
+    return os.path.join(checkpoint_dir, f"{identifier}.json")
+
+
+def save_checkpoint(path, state):
+    # Compact JSON written to a temp file and renamed, so a crash mid-write never
+    # leaves a truncated checkpoint behind.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"), default=str)
+    os.replace(tmp_path, path)
+    logger.info("Checkpoint saved to %s (%s topics completed).", path, len(state.get("completed_topics", [])))
+
+
+def load_checkpoint(path):
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("Unable to read checkpoint %s; starting from scratch: %s", path, e)
+        return None
+
+
+def remove_checkpoint(path):
+    try:
+        os.remove(path)
+        logger.info("Checkpoint %s removed.", path)
+    except FileNotFoundError:
+        pass
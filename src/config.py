@@ -1,7 +1,11 @@
-import autogen
+import functools
 import os
 
+# Parsed once per process; every caller shares the same dict, so treat it as read-only.
+@functools.lru_cache(maxsize=None)
 def get_llm_config():
+    import autogen
+
     config_list = autogen.config_list_from_json(
         env_or_file="OAI_CONFIG_LIST",
         file_location=".",
@@ -15,4 +19,4 @@ def get_llm_config():
         "max_tokens": 2048
     }
     
-    return llm_config
\ No newline at end of file
+    return llm_config
@@ -10,7 +10,7 @@ def load_json_file(file_path):
         with open(file_path, "r", encoding="utf-8") as f:
             return json.load(f)
     except FileNotFoundError:
-        logger.error(f"File invalid: {file_path}")
+        logger.error("File invalid: %s", file_path)
         raise
 
 def load_chatprompt(file_path="scale/chatdemo.json"):
@@ -0,0 +1,79 @@
+import logging
+from llm_client import stream_chat_completion
+from rate_limit import limiter_for_agent, endpoint_config, estimate_tokens
+from token_ledger import get_token_ledger
+
+logger = logging.getLogger(__name__)
+
+
+class DirectDispatcher:
+    # Calls the target agent's generate_reply directly with an explicit message list,
+    # skipping the GroupChatManager hop, speaker selection and per-agent history copies.
+    # The agent still prepends its own system message and uses its llm_config, but the
+    # history holds each turn once (the group-chat path repeats it per agent), so prompts
+    # and cache_seed entries differ from the group-chat path.
+    def __init__(self, agents, proxy_name="UserProxy"):
+        self.agents = list(agents)
+        self.proxy_name = proxy_name
+        self.messages = []
+
+    @property
+    def groupchat(self):
+        # Mirrors GroupChatManager.groupchat so callers can address the history alike.
+        return self
+
+    def reset(self):
+        self.messages.clear()
+
+    def fork(self):
+        # Independent copy of the history for a request made off the main conversation.
+        forked = DirectDispatcher(self.agents, proxy_name=self.proxy_name)
+        forked.messages = list(self.messages)
+        # The fork starts from the parent's token counts instead of re-tokenizing the history.
+        forked.token_ledger = get_token_ledger(self).copy()
+        return forked
+
+    def _conversation_for(self, agent):
+        return [
+            {
+                "content": message["content"],
+                "role": "assistant" if message.get("name") == agent.name else "user",
+                "name": message.get("name", self.proxy_name)
+            }
+            for message in self.messages
+        ]
+
+    def _stream_reply(self, agent, config, on_delta):
+        # Same request the agent would send (its system message, first config entry and
+        # sampling parameters), but streamed through the shared client.
+        llm_config = agent.llm_config
+        params = {key: llm_config[key] for key in ("temperature", "max_tokens") if key in llm_config}
+        messages = [{"content": agent.system_message, "role": "system"}] + self._conversation_for(agent)
+        return stream_chat_completion(config.get("base_url"), config.get("api_key"), config["model"], messages, on_delta=on_delta, **params)
+
+    def request(self, agent, prompt, on_delta=None):
+        history_length = len(self.messages)
+        self.messages.append({"content": prompt, "role": "user", "name": self.proxy_name})
+        try:
+            config = endpoint_config(agent)
+            if on_delta is not None and config is not None:
+                reply = self._stream_reply(agent, config, on_delta)
+            else:
+                # Agents without an endpoint cannot stream; they answer through generate_reply.
+                conversation = self._conversation_for(agent)
+                max_tokens = agent.llm_config.get("max_tokens") if config is not None else None
+                reply = limiter_for_agent(agent).call(
+                    lambda: agent.generate_reply(messages=conversation),
+                    tokens=estimate_tokens(conversation, max_tokens)
+                )
+            if isinstance(reply, dict):
+                reply = reply.get("content")
+            if reply is None:
+                raise RuntimeError(f"{agent.name} returned no reply.")
+        except Exception:
+            # A failed turn leaves no prompt behind, so the next request is not sent after a
+            # dangling user message.
+            del self.messages[history_length:]
+            raise
+        self.messages.append({"content": reply, "role": "user", "name": agent.name})
+        return reply
@@ -0,0 +1,124 @@
+# Local stand-in for MemoryGraph.extract_key_info_with_api: lexicon and regex matching
+# over the answer, rendered in the same "Category: a, b; ..." key-info format.
+import re
+
+CATEGORIES = ("Emotion", "Frequency", "Symptom", "Duration", "Impact")
+# Words that only name an emotion after a verb or intensifier ("feeling down", not "sit down").
+_FEEL = r"(?:feel|feels|feeling|felt|been|get|gets|getting|got|so|very|really|pretty|quite|kind of|a bit|a little)"
+
+
+def _after_feel(word):
+    return re.compile(rf"{_FEEL}\s+{word}")
+
+
+# canonical entity -> surface forms; compiled patterns are used as they are
+EMOTIONS = {
+    "sadness": ("sad", "sadness", "unhappy", _after_feel("down"), _after_feel("blue"), _after_feel("low"), "low mood", "down in the dumps"),
+    "depression": ("depressed", "depression", "depressing"),
+    "hopelessness": ("hopeless", "hopelessness", "no hope"),
+    "anxiety": ("anxious", "anxiety", "nervous", "worried", "worry", "worrying", "on edge"),
+    "stress": ("stress", "stressed", "stressful", "overwhelmed", "pressure"),
+    "loneliness": ("lonely", "loneliness", "isolated", "alone"),
+    "irritability": ("irritable", "irritated", "angry", "anger", "frustrated", "annoyed"),
+    "guilt": ("guilty", "guilt", "ashamed", "shame"),
+    "emptiness": ("empty", "numb", "emptiness"),
+    "happiness": ("happy", "happiness", "cheerful", "joy", _after_feel("content"), "content with"),
+    "fear": ("afraid", "scared", "fear", "panic"),
+}
+SYMPTOMS = {
+    "insomnia": ("insomnia", re.compile(r"(?:not|haven't|hasn't|don't|didn't|can't|cannot)\s+(?:been\s+)?(?:sleeping|slept|sleep)(?:\s+well)?"), "sleeping badly", "poor sleep", "can't sleep", "cannot sleep", "trouble sleeping", "hard to sleep", "difficulty sleeping", "falling asleep", "staying asleep", "wake up at night", "waking up"),
+    "oversleeping": ("oversleep", "oversleeping", "sleeping too much", "sleep too much"),
+    "fatigue": ("tired", "tiredness", "fatigue", "fatigued", "exhausted", "exhaustion", "no energy", "low energy", "drained", "worn out"),
+    "appetite loss": ("no appetite", "poor appetite", "lost my appetite", "loss of appetite", "not hungry", "don't feel like eating", "eating less"),
+    "overeating": ("overeating", "eating more", "eat too much", "binge"),
+    "weight change": ("weight change", "weight changes", "weight loss", "weight gain", "put on weight", re.compile(r"(?:lost|lose|losing|gained|gain|gaining)\s+(?:\w+\s+){0,3}weight"), re.compile(r"weight\s+(?:has\s+|have\s+)?(?:changed|dropped|gone up|gone down|increased|decreased)")),
+    "loss of interest": ("no interest", "lost interest", "loss of interest", "don't enjoy", "no pleasure", "not interested", "no motivation", "unmotivated"),
+    "poor concentration": ("can't concentrate", "cannot concentrate", "trouble concentrating", "hard to concentrate", "can't focus", "cannot focus", "distracted", "forgetful"),
+    "worthlessness": ("worthless", "failure", "useless", "let down", "letting down", "not good enough"),
+    "restlessness": ("restless", "fidgety", "can't sit still"),
+    "psychomotor slowing": ("slowed down", "moving slowly", "sluggish", "slow"),
+    "crying": ("crying", "cry", "tearful", "tears"),
+    "headache": ("headache", "headaches"),
+}
+FREQUENCIES = {
+    "nearly every day": ("nearly every day", "almost every day", "most days", "more than half the days"),
+    "every day": ("every day", "everyday", "daily", "every night"),
+    "always": ("always", "all the time", "constantly", "all day"),
+    "often": ("often", "frequently", "usually"),
+    "several days": ("several days", "a few days", "a couple of days", "couple of days", "some days"),
+    "sometimes": ("sometimes", "occasionally", "now and then", "once in a while", "from time to time"),
+    "rarely": ("rarely", "seldom", "hardly ever", "once or twice"),
+    "never": ("never", "not at all"),
+}
+IMPACTS = {
+    "work": (re.compile(r"(?:at|to|from|for|off|with|my|our|of) work"), "workplace", "workload", "job", "career", "office", "boss", "coworkers", "colleagues"),
+    "school": ("school", "study", "studies", "studying", "class", "classes", "exams", "homework"),
+    "family": ("family", "kids", "children", "wife", "husband", "partner", "parents", "marriage"),
+    "social": ("friends", "social", "socially", "people", "going out", "relationships", "relationship"),
+    "daily life": ("daily life", "daily routine", "chores", "housework", "everyday life", "day to day life", "day-to-day life"),
+    "hobbies": ("hobbies", "hobby", "sports", "exercise", "gym"),
+}
+NUMBER_WORDS = r"(?:a|an|one|two|three|four|five|six|seven|eight|nine|ten|several|a few|few|a couple of|couple of|\d+)"
+DURATION_RE = re.compile(rf"\b(?:(?:for|over|about|around|almost|nearly|past|last|the past|the last)\s+)*{NUMBER_WORDS}\s+(?:day|week|month|year)s?\b")
+DURATION_WORDS = re.compile(r"\b(?:lately|recently|for a while|for a long time|for (?:days|weeks|months|years)|since (?:last|the) \w+)\b")
+NEGATION_RE = re.compile(r"\b(not|no|never|nothing|don't|dont|doesn't|didn't|haven't|hasn't|isn't|wasn't|can't|cannot|without)\b(?:\s+\w+){0,2}\s*$")
+
+
+def _compile(lexicon):
+    patterns = []
+    for entity, forms in lexicon.items():
+        for form in forms:
+            source = form.pattern if isinstance(form, re.Pattern) else re.escape(form)
+            patterns.append((re.compile(rf"\b{source}\b"), entity))
+    # Longer forms first so "no energy" wins over "energy" and "every day" over "day".
+    patterns.sort(key=lambda item: -len(item[0].pattern))
+    return patterns
+
+
+_LEXICONS = {
+    "Emotion": _compile(EMOTIONS),
+    "Frequency": _compile(FREQUENCIES),
+    "Symptom": _compile(SYMPTOMS),
+    "Impact": _compile(IMPACTS),
+}
+# A negated emotion or symptom is kept with a prefix ("not happiness", "no insomnia").
+_NEGATED_PREFIX = {"Emotion": "not", "Symptom": "no"}
+
+
+def _mask(text, start, end):
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+def extract_entities(text):
+    text = " ".join(text.lower().replace("’", "'").split())
+    entities = {category: [] for category in CATEGORIES}
+
+    def add(category, value):
+        if value not in entities[category]:
+            entities[category].append(value)
+
+    # Symptoms and emotions first, so a negation word that governs one ("never feel
+    # happy") is masked and not also read as a frequency; every lexicon runs before
+    # the duration patterns so "a few days" is not also read as a duration.
+    remaining = text
+    for category in ("Symptom", "Emotion", "Frequency", "Impact"):
+        for pattern, entity in _LEXICONS[category]:
+            for match in pattern.finditer(remaining):
+                negation = NEGATION_RE.search(text[:match.start()]) if category in _NEGATED_PREFIX else None
+                if negation:
+                    add(category, f"{_NEGATED_PREFIX[category]} {entity}")
+                    remaining = _mask(remaining, negation.start(1), negation.end(1))
+                else:
+                    add(category, entity)
+                remaining = _mask(remaining, match.start(), match.end())
+    for match in DURATION_RE.finditer(remaining):
+        add("Duration", match.group(0).strip())
+    for match in DURATION_WORDS.finditer(remaining):
+        add("Duration", match.group(0))
+    return entities
+
+
+def extract_key_info(text):
+    # Same rendering as the API path; returns "" when nothing was recognised.
+    entities = extract_entities(text)
+    return "; ".join(f"{category}: {', '.join(values)}" for category, values in entities.items() if values)
@@ -4,79 +4,117 @@ import os
 import sys
 import contextlib
 import logging
-import pandas as pd
 from data_load import load_scoring_standards
-from logging_setup import dialog_print
+from logging_setup import dialog_print, payload
+from tracing import span
+from llm_client import chat_completion
+from rate_limit import LLMUnavailableError
+from transcript_index import TranscriptIndex
 
 logger = logging.getLogger(__name__)
 base_url = os.getenv("API_BASE_URL", "https://api.deepseek.ai/v1")
 api_key = os.getenv("API_KEY", "your_api_key_here")
 model_name = os.getenv("API_MODEL", "deepseek-r1-32b")
+# "full" sends the whole interview with every reply, "retrieval" only the top-k most relevant exchanges.
+patient_context = os.getenv("PATIENT_CONTEXT", "full")
+patient_top_k = int(os.getenv("PATIENT_TOP_K", "6"))
+BASIC_INFO_QUERY = "age old years gender male female occupation work job"
 
 
-def generate_mock_response(question, topic, identification, real_interview, scale_scores, scoring_standard=None, current_topic_history=None, depth=0, clear_memory=False, scale_name="PHQ-8"):
-    interview_history = ""
-    for para in real_interview:
-        role = para.get("roleName", "Unknown role")
-        content = para.get("content", "")
-        interview_history += f"{role}: {content}\n"
+def render_interview(real_interview):
+    return "".join(f"{para.get('roleName', 'Unknown role')}: {para.get('content', '')}\n" for para in real_interview)
 
-    if clear_memory:
-        prompt = "Please forget all previous conversation content and start a new session. Limit your response to 10 words."
-        logger.info("Clearing API's conversation memory...")
 
-    elif identification == "":
-        prompt = f"""Please answer the following question:\n{question}\n
+def build_patient_prompt(question, identification, scoring_standard=None, current_topic_history=None, depth=0):
+    if identification == "":
+        return f"""Please answer the following question:\n{question}\n
 Please provide your basic information (age, gender, occupation) in the format 'age:<age>, gender:<gender>, occupation:<occupation>' (e.g., age:25, gender:male, occupation:engineer). If the dialogue does not explicitly mention age, gender, or occupation, infer plausible values based on the context of the dialogue (e.g., tone, content, or implied demographics). For gender, only use one of the following options: 'male', 'female', or 'other'. For age, use a realistic value between 0 and 80.
 Ensure the response is concise and follows the requested format without adding anything else.\n
 """
-        logger.info(f"Prompt for generating simulated reply: {prompt}")
-    else:
-        if depth == 0:
-            prompt = f"""Please answer the following question:\n{question}\nPlease provide a truthful and reasonable answer based on your real interview dialogue and your profile, with no more than 50 words:"""
-        else:
-            scoring_standard_str = "\n".join([f"{k} - {v}" for k, v in scoring_standard.items()])
-            topic_history_str = ""
-            if current_topic_history:
-                for qa in current_topic_history:
-                    topic_history_str += f"Question: {qa['question']}\nUser's Response: {qa['response']}\n"
-
-            prompt = f"""Please answer the following in-depth question:\n{question}\n
+    if depth == 0:
+        return f"""Please answer the following question:\n{question}\nPlease provide a truthful and reasonable answer based on your real interview dialogue and your profile, with no more than 50 words:"""
+    topic_history_str = ""
+    if current_topic_history:
+        for qa in current_topic_history:
+            topic_history_str += f"Question: {qa['question']}\nUser's Response: {qa['response']}\n"
+    return f"""Please answer the following in-depth question:\n{question}\n
 Please provide a truthful and reasonable answer based on the interview dialogue and all your previous responses. Do not fabricate symptom situations in your response. Your previous responses: \n{topic_history_str}\n
 When the question content exceeds the scope of the interview dialogue and cannot be accurately answered, you may choose to answer 'not sure' or a similar expression, but use it sparingly and provide a reason that fits the patient's information.
 Limit your response to 50 words.
 """
-        logger.info(f"Prompt for generating simulated reply: {prompt}")
 
-    try:
-        from openai import OpenAI
-        client = OpenAI(
-            base_url=base_url,
-            api_key=api_key
-        )
-        system_prompt = f"""You are speaking with a psychological assistant, and you are the client in this conversation with the following interview dialogue:
-{interview_history}
+
+# One simulated client per participant. The transcript is rendered once and the system
+# message is the same string on every call, so the shared prefix of each request stays
+# byte-identical and can be served from the provider's prompt cache.
+class SimulatedPatient:
+    def __init__(self, real_interview, scale_scores=None, scale_name="PHQ-8", model=None, context=None, top_k=None):
+        self.scale_scores = scale_scores or {}
+        self.scale_name = scale_name
+        self.model = model or model_name
+        self.context = context or patient_context
+        self.top_k = top_k or patient_top_k
+        if self.context == "retrieval":
+            # The excerpts change per question, so they go into the user message and the
+            # system prompt stays a fixed preamble.
+            self.index = TranscriptIndex(real_interview)
+            self.interview_history = None
+            self.system_prompt = """You are speaking with a psychological assistant, and you are the client in this conversation. Each question comes with the excerpts of your real interview dialogue that are most relevant to it.
+
+You should follow the provided information to act as a client in the conversation. Your responses should be coherent and avoid repeating previous utterances.
+Your response should ONLY include what the Client should say, in a natural, first-person tone.
+"""
+        else:
+            self.index = None
+            self.interview_history = render_interview(real_interview)
+            self.system_prompt = f"""You are speaking with a psychological assistant, and you are the client in this conversation with the following interview dialogue:
+{self.interview_history}
 
 You should follow the provided information to act as a client in the conversation. Your responses should be coherent and avoid repeating previous utterances.
 Your response should ONLY include what the Client should say, in a natural, first-person tone.
-""" 
-        completion = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0
-        )
-        response = completion.choices[0].message.content
-        logger.info(f"Generated simulated reply: {response}")
-
-        think_index = response.find("</think>")
-        if think_index != -1:
-            response = response[think_index + len("</think>") :].strip()
-
-        return response
-
-    except Exception as e:
-        logger.exception(f"Error while calling API to generate reply: {e}")
-        return "Sorry, I cannot answer this question at the moment."
\ No newline at end of file
+"""
+        self._system_message = {"role": "system", "content": self.system_prompt}
+
+    def excerpts(self, question, topic=None, identification=""):
+        query = f"{question} {topic or ''} {BASIC_INFO_QUERY if identification == '' else ''}"
+        hits = self.index.top_k(query, self.top_k)
+        if not hits:
+            hits = self.index.exchanges[:self.top_k]
+        return "".join(hits)
+
+    def reply(self, question, topic=None, identification="", scoring_standard=None, current_topic_history=None, depth=0):
+        prompt = build_patient_prompt(question, identification, scoring_standard, current_topic_history, depth)
+        if self.index is not None:
+            prompt = f"Relevant excerpts from your interview dialogue:\n{self.excerpts(question, topic, identification)}\n{prompt}"
+        logger.info("Prompt for generating simulated reply: %s", payload(prompt))
+        try:
+            with span("patient"):
+                response = chat_completion(
+                    base_url,
+                    api_key,
+                    model=self.model,
+                    messages=[self._system_message, {"role": "user", "content": prompt}],
+                    temperature=0
+                )
+            logger.info("Generated simulated reply: %s", payload(response))
+
+            think_index = response.find("</think>")
+            if think_index != -1:
+                response = response[think_index + len("</think>") :].strip()
+
+            return response
+
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            logger.exception("Error while calling API to generate reply: %s", e)
+            return "Sorry, I cannot answer this question at the moment."
+
+
+# Kept for callers that do not hold a SimulatedPatient. Every call is stateless, so there
+# is no server-side conversation memory to clear.
+def generate_mock_response(question, topic, identification, real_interview, scale_scores, scoring_standard=None, current_topic_history=None, depth=0, clear_memory=False, scale_name="PHQ-8"):
+    if clear_memory:
+        return ""
+    patient = SimulatedPatient(real_interview, scale_scores, scale_name)
+    return patient.reply(question, topic, identification, scoring_standard, current_topic_history, depth)
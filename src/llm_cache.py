@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+cache_enabled = os.getenv("LLM_CACHE", "1") != "0"
+cache_path = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite"))
+max_cache_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+EVICTION_CHECK_INTERVAL = 64
+
+
+class LLMCache:
+    # Content-addressed response cache shared by threads (one connection each) and by
+    # processes (SQLite WAL mode plus a busy timeout).
+    def __init__(self, path, max_bytes=max_cache_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(base_url, model, messages, params):
+        # The endpoint is part of the key: two servers may serve different weights under one model name.
+        payload = json.dumps({"base_url": base_url, "model": model, "messages": messages, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        conn = self._connection()
+        try:
+            row = conn.execute("SELECT response FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            logger.warning("LLM cache read failed: %s", e)
+            row = None
+        with self._counter_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row is not None else None
+
+    def set(self, key, response):
+        now = time.time()
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode("utf-8")), now, now)
+            )
+        except sqlite3.Error as e:
+            logger.warning("LLM cache write failed: %s", e)
+            return
+        with self._counter_lock:
+            self._writes += 1
+            check_eviction = self._writes % EVICTION_CHECK_INTERVAL == 0
+        if check_eviction:
+            self.evict()
+
+    def evict(self):
+        conn = self._connection()
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Keep the most recently used entries up to 90% of the budget.
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC) AS running FROM entries) "
+                "WHERE running > ?)",
+                (int(self.max_bytes * 0.9),)
+            )
+            logger.info("LLM cache evicted entries; size was %s bytes, budget %s bytes.", total, self.max_bytes)
+        except sqlite3.Error as e:
+            logger.warning("LLM cache eviction failed: %s", e)
+
+    def stats(self):
+        entries, size = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if not cache_enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(cache_path)
+                logger.info("LLM response cache opened at %s.", cache_path)
+    return _cache
+
+
+def log_cache_stats():
+    if _cache is None:
+        return
+    stats = _cache.stats()
+    logger.info("LLM cache stats: %s hits, %s misses, %s entries, %s bytes.", stats["hits"], stats["misses"], stats["entries"], stats["bytes"])
+    return stats
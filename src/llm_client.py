@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+import logging
+from llm_cache import get_cache
+from tracing import current_span
+from rate_limit import get_limiter, estimate_tokens
+
+logger = logging.getLogger(__name__)
+pool_size = int(os.getenv("LLM_POOL_SIZE", "32"))
+request_timeout = float(os.getenv("LLM_TIMEOUT", "120"))
+connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+keepalive_expiry = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# One client per (base_url, api_key), shared by every raw OpenAI call site so that
+# simulated replies, extraction and reassessment reuse warm keep-alive connections.
+# openai and httpx are imported when the first client is built.
+_clients = {}
+_lock = threading.Lock()
+
+
+def _limits():
+    import httpx
+    return httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=keepalive_expiry)
+
+
+def _timeout():
+    import httpx
+    return httpx.Timeout(request_timeout, connect=connect_timeout)
+
+
+def get_client(base_url, api_key):
+    key = (base_url, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                from openai import OpenAI, DefaultHttpxClient
+                client = OpenAI(
+                    base_url=base_url,
+                    api_key=api_key,
+                    timeout=_timeout(),
+                    http_client=DefaultHttpxClient(limits=_limits(), timeout=_timeout())
+                )
+                _clients[key] = client
+                logger.info("Created pooled OpenAI client for %s (pool size %s).", base_url, pool_size)
+    return client
+
+
+def _record_usage(completion):
+    span = current_span()
+    if span.active:
+        usage = getattr(completion, "usage", None)
+        span.set(
+            cache_hit=False,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None)
+        )
+
+
+def chat_completion(base_url, api_key, model, messages, **params):
+    cache = get_cache()
+    if cache is not None:
+        key = cache.make_key(base_url, model, messages, params)
+        cached = cache.get(key)
+        if cached is not None:
+            current_span().set(cache_hit=True)
+            return cached
+    client = get_client(base_url, api_key)
+    completion = get_limiter(base_url).call(
+        lambda: client.chat.completions.create(model=model, messages=messages, **params),
+        tokens=estimate_tokens(messages, params.get("max_tokens"))
+    )
+    _record_usage(completion)
+    content = completion.choices[0].message.content
+    if cache is not None and content is not None:
+        cache.set(key, content)
+    return content
+
+
+# Streams the reply, passing each content delta to on_delta, and returns the full text.
+# Time to first token is logged and recorded on the current span. The cache is bypassed:
+# streaming is only used for interactive sessions, whose prompts never repeat. Only
+# opening the stream is retried; deltas may already be on screen once it has started.
+def stream_chat_completion(base_url, api_key, model, messages, on_delta=None, **params):
+    start = time.perf_counter()
+    ttft = None
+    parts = []
+    client = get_client(base_url, api_key)
+    stream = get_limiter(base_url).call(
+        lambda: client.chat.completions.create(model=model, messages=messages, stream=True, **params),
+        tokens=estimate_tokens(messages, params.get("max_tokens"))
+    )
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+                logger.info("Time to first token from %s: %.0f ms", model, ttft * 1000)
+                current_span().set(ttft_ms=round(ttft * 1000, 3))
+            parts.append(delta)
+            if on_delta is not None:
+                on_delta(delta)
+    finally:
+        stream.close()
+    return "".join(parts)
+
+
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
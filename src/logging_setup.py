@@ -1,32 +1,200 @@
 import os
 import sys
+import json
+import time
+import queue
+import atexit
+import hashlib
 import logging
+import threading
+import logging.handlers
 from datetime import datetime
 
+log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+# How prompts and responses appear in the log: "full", "truncate" (first
+# LOG_PAYLOAD_MAX_CHARS characters plus length and hash) or "hash" (length and hash only).
+log_payload_mode = os.getenv("LOG_PAYLOAD_MODE", "truncate")
+log_payload_max_chars = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+transcript_flush_interval = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "5"))
+transcript_background = os.getenv("TRANSCRIPT_BACKGROUND", "0") == "1"
+transcript_records = os.getenv("TRANSCRIPT_RECORDS", "1") != "0"
+
 dialog_log_file = None
+_session = threading.local()
+# Every writer not yet closed, so the atexit hook can drain them.
+_open_writers = set()
+_writers_lock = threading.Lock()
+
+
+# One per dialog log. Text lines and JSONL records (role, topic, depth, text, ts) are
+# buffered and written together at topic boundaries, once flush_interval has passed
+# since the last write, and on close. With background=True a writer thread does the
+# file I/O and also flushes on the interval when the dialog is idle.
+class TranscriptWriter:
+    def __init__(self, text_path, records_path=None, flush_interval=transcript_flush_interval, background=transcript_background):
+        self.text_path = text_path
+        self.records_path = records_path
+        self.flush_interval = flush_interval
+        self._text_file = open(text_path, "w", encoding="utf-8")
+        self._records_file = open(records_path, "w", encoding="utf-8") if records_path else None
+        self._lines = []
+        self._records = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._queue = None
+        self._thread = None
+        with _writers_lock:
+            _open_writers.add(self)
+        if background:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._drain, name="transcript-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, text):
+        with self._lock:
+            self._lines.append(text + "\n")
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def record(self, role, text, topic=None, depth=None, **fields):
+        if self._records_file is None:
+            return
+        line = json.dumps({"ts": time.time(), "role": role, "topic": topic, "depth": depth, "text": text, **fields}, ensure_ascii=False)
+        with self._lock:
+            self._records.append(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            if self._closed:
+                return
+            lines, records = self._lines, self._records
+            self._lines, self._records = [], []
+            self._last_flush = time.monotonic()
+        if not lines and not records:
+            return
+        if self._queue is not None:
+            self._queue.put((lines, records))
+        else:
+            self._write(lines, records)
+
+    def _write(self, lines, records):
+        if lines:
+            self._text_file.write("".join(lines))
+            self._text_file.flush()
+        if records:
+            self._records_file.write("".join(records))
+            self._records_file.flush()
+
+    def _drain(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+                continue
+            if item is None:
+                return
+            self._write(*item)
+
+    def close(self):
+        # Idempotent: the atexit hook may close a writer the caller already closed.
+        with _writers_lock:
+            if self not in _open_writers:
+                return
+            _open_writers.discard(self)
+        self.flush()
+        with self._lock:
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._text_file.close()
+        if self._records_file is not None:
+            self._records_file.close()
+
+
+def close_open_transcripts():
+    # sys.exit on EOF, Ctrl-C or a fatal error skips the explicit closes; without this
+    # the buffered lines and the writer thread's queue would be lost.
+    with _writers_lock:
+        writers = list(_open_writers)
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_open_transcripts)
+
+
+def _open_transcript(log_file):
+    records_path = os.path.splitext(log_file)[0] + ".jsonl" if transcript_records else None
+    return TranscriptWriter(log_file, records_path)
+
+
+# Wraps a prompt or response passed as a %-style logging argument. Nothing is rendered
+# unless the record is emitted, so disabled levels cost no formatting.
+class LogPayload:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else json.dumps(self.value, ensure_ascii=False, default=str)
+        if log_payload_mode == "full" or (log_payload_mode == "truncate" and len(text) <= log_payload_max_chars):
+            return text
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        if log_payload_mode == "hash":
+            return f"<{len(text)} chars, sha1 {digest}>"
+        return f"{text[:log_payload_max_chars]}... <{len(text)} chars, sha1 {digest}>"
+
+
+def payload(value):
+    return LogPayload(value)
+
+
+_listener = None
+
 
 def setup_logging(log_dir='logs'):
+    global _listener
     current_dir = os.path.dirname(os.path.abspath(__file__))
     log_path = os.path.join(current_dir, log_dir)
 
     if not os.path.exists(log_path):
         os.makedirs(log_path)
 
-    log_filename = datetime.now().strftime("log_%Y%m%d_%H%M%S.log")
+    # One file per process, so workers started in the same second never share a file.
+    log_filename = datetime.now().strftime(f"log_%Y%m%d_%H%M%S_{os.getpid()}.log")
     log_file = os.path.join(log_path, log_filename)
 
-    logging.basicConfig(
-        level=logging.INFO,  
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8')
-        ]
-    )
+    # Callers only enqueue records; the listener thread formats them and does the file I/O.
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(process)d - %(message)s'))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    # The queue handler only renders the message (and any traceback); timestamps and
+    # levels are added once, by the file handler's formatter.
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=getattr(logging, log_level, logging.INFO), handlers=[queue_handler])
 
     logger = logging.getLogger()
     logger.info("The log system has been initialized.")
     return logger
 
+
+def stop_logging():
+    # Drains the queue into the file; registered with atexit by setup_logging.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 def initialize_dialog_log(log_dir='dialog_logs'):
     global dialog_log_file  
 
@@ -39,14 +207,93 @@ def initialize_dialog_log(log_dir='dialog_logs'):
     log_filename = datetime.now().strftime("dialog_model_%Y%m%d_%H%M%S.txt")
     log_file = os.path.join(log_path, log_filename)
 
-    dialog_log_file = open(log_file, 'w', encoding='utf-8')
+    dialog_log_file = _open_transcript(log_file)
     print(f"The dialogue log system has been initialized. Log file: {log_file}")
 
+def initialize_session_dialog_log(identifier, log_dir='dialog_logs'):
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    log_path = os.path.join(current_dir, log_dir)
+    os.makedirs(log_path, exist_ok=True)
+
+    log_filename = datetime.now().strftime(f"dialog_{identifier}_%Y%m%d_%H%M%S.txt")
+    _session.file = _open_transcript(os.path.join(log_path, log_filename))
+
+
+def close_session_dialog_log():
+    log_file = getattr(_session, "file", None)
+    if log_file:
+        log_file.close()
+        _session.file = None
+
+
+def _current_transcript():
+    return getattr(_session, "file", None) or dialog_log_file
+
+
+def _write_dialog_log(text):
+    log_file = _current_transcript()
+    if log_file:
+        log_file.write(text)
+
+
 def dialog_print(text):
     print(text)  
-    if dialog_log_file:
-        dialog_log_file.write(text + '\n')  
-        dialog_log_file.flush()  
+    _write_dialog_log(text)
+
+
+def dialog_record(role, text, topic=None, depth=None, **fields):
+    log_file = _current_transcript()
+    if log_file:
+        log_file.record(role, text, topic=topic, depth=depth, **fields)
+
+
+def flush_dialog_log():
+    log_file = _current_transcript()
+    if log_file:
+        log_file.flush()
+
+
+def _strip_think(text):
+    end = text.find("</think>")
+    if end != -1:
+        return text[end + len("</think>"):].lstrip()
+    head = text.lstrip()
+    if head.startswith("<think>") or "<think>".startswith(head):
+        return ""
+    return head
+
+
+# Prints a reply to the console as deltas arrive. Reasoning wrapped in <think> is held
+# back, and `extract` can narrow the visible text (e.g. one field of a JSON reply).
+# The dialog log only receives the final text, written once in finish().
+class DialogStream:
+    def __init__(self, prefix="", extract=None):
+        self.prefix = prefix
+        self.extract = extract
+        self._raw = ""
+        self._shown = ""
+
+    def __call__(self, delta):
+        self._raw += delta
+        visible = _strip_think(self._raw)
+        if self.extract is not None:
+            visible = self.extract(visible)
+        if len(visible) > len(self._shown):
+            if not self._shown:
+                print(self.prefix, end="")
+            print(visible[len(self._shown):], end="", flush=True)
+            self._shown = visible
+
+    def finish(self, text):
+        if not self._shown and not text:
+            return
+        if not self._shown:
+            print(f"{self.prefix}{text}")
+        elif self._shown.strip() == text.strip():
+            print()
+        else:
+            print(f"\n{self.prefix}{text}")
+        _write_dialog_log(f"{self.prefix}{text}")
 
 def close_dialog_log():
     global dialog_log_file
@@ -1,37 +1,65 @@
 import os
 import sys
+import argparse
 import logging
-import pandas as pd
-from config import get_llm_config
 from data_load import load_chatprompt, load_scoring_standards, load_real_data
 from logging_setup import setup_logging, initialize_dialog_log, dialog_print, close_dialog_log
 from utils import get_valid_input, choose_mode
-from assessment import process_single_file
+from batch import run_batch, run_queue, select_participants, shard_output_path
+from results import merge_results
+from work_queue import WorkQueue, format_queue_status
+from llm_client import close_clients
+from llm_cache import log_cache_stats
+from necessity import log_necessity_stats
+from tracing import trace_file, enable_tracing, close_tracing
 
+DEFAULT_DATA_DIR = "../data/processed_train_daic_woz"
+DEFAULT_OUTPUT = "evaluation/72b.csv"
+SCALE_PROMPTS = {"PHQ-8": "../scales/PHQ-8.json"}
+MODES = {"manual": "1", "auto": "2"}
 
-if __name__ == "__main__":
-    logger = setup_logging()
-    initialize_dialog_log()
-    logger.info("Psychological assessment program started.")
 
-    data_dir = "" # Specify the directory containing the processed JSON files
-    if not os.path.exists(data_dir):
-        logger.error(f"Data folder {data_dir} does not exist.")
-        dialog_print(f"Error: Data folder {data_dir} does not exist.")
-        sys.exit(1)
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got '{value}'")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, N), got '{value}'")
+    return index, count
 
-    json_files = [os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(".json")]
-    if not json_files:
-        logger.error(f"No JSON files found in folder {data_dir}.")
-        dialog_print(f"Error: No JSON files found in folder {data_dir}.")
-        sys.exit(1)
 
-    logger.info(f"Found {len(json_files)} JSON files in folder {data_dir}.")
-    dialog_print(f"Found {len(json_files)} JSON files in folder {data_dir}.")
+def parse_ids(values):
+    return [identifier.strip() for value in values or [] for identifier in value.split(",") if identifier.strip()]
 
-    scoring_standards = load_scoring_standards("../scales/scoring_standards.json")
 
-    available_scales = list(scoring_standards.keys())
+def build_parser():
+    parser = argparse.ArgumentParser(description="AgentMental psychological assessment. Without arguments, scale and mode are asked interactively.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run = subparsers.add_parser("run", help="Assess the participants in a data directory.")
+    run.add_argument("--scale", help="Assessment scale, e.g. PHQ-8 (asked interactively if omitted).")
+    run.add_argument("--mode", choices=MODES, help="manual (console answers) or auto (simulated patient); asked interactively if omitted.")
+    run.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Directory with the processed participant JSON files.")
+    run.add_argument("--output", default=DEFAULT_OUTPUT, help="Evaluation CSV; with --shard, a per-shard file next to it.")
+    run.add_argument("--concurrency", type=int, default=int(os.getenv("MAX_CONCURRENCY", "1")), help="Participants assessed at once (auto mode only).")
+    run.add_argument("--shard", type=parse_shard, metavar="i/N", help="Only assess participants whose identifier hashes to shard i of N.")
+    run.add_argument("--limit", type=int, help="Assess at most this many participants (after --ids and --shard).")
+    run.add_argument("--ids", action="append", metavar="ID[,ID...]", help="Only assess these participant identifiers; repeatable.")
+    run.add_argument("--queue", metavar="PATH", help="Claim participants from this SQLite work queue, so several worker processes can share one data dir.")
+
+    merge = subparsers.add_parser("merge", help="Combine per-shard results into one evaluation CSV.")
+    merge.add_argument("sources", nargs="*", help="Shard result files (.csv or .jsonl); defaults to the shard files of --output.")
+    merge.add_argument("--output", default=DEFAULT_OUTPUT, help="Merged evaluation CSV.")
+    merge.add_argument("--shards", type=int, help="Number of shards to look for when no sources are given.")
+
+    status = subparsers.add_parser("status", help="Show the state of a work queue.")
+    status.add_argument("--queue", required=True, metavar="PATH")
+    status.add_argument("--retry-failed", action="store_true", help="Return failed participants to pending with a fresh retry budget.")
+    return parser
+
+
+def choose_scale(available_scales):
     dialog_print("Please choose the psychological assessment scale to use:")
     for idx, scale in enumerate(available_scales, 1):
         print(f"{idx}. {scale}")
@@ -41,28 +69,125 @@ if __name__ == "__main__":
         if scale_choice.isdigit():
             scale_idx = int(scale_choice)
             if 1 <= scale_idx <= len(available_scales):
-                selected_scale = available_scales[scale_idx - 1]
-                break
+                return available_scales[scale_idx - 1]
         dialog_print("Invalid choice, please try again.")
 
-    logger.info(f"Selected scale: {selected_scale}")
+
+def run_command(args, logger):
+    data_dir = args.data_dir
+    if not os.path.exists(data_dir):
+        logger.error("Data folder %s does not exist.", data_dir)
+        dialog_print(f"Error: Data folder {data_dir} does not exist.")
+        sys.exit(1)
+
+    json_files = [os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(".json")]
+    if not json_files:
+        logger.error("No JSON files found in folder %s.", data_dir)
+        dialog_print(f"Error: No JSON files found in folder {data_dir}.")
+        sys.exit(1)
+
+    logger.info("Found %s JSON files in folder %s.", len(json_files), data_dir)
+    dialog_print(f"Found {len(json_files)} JSON files in folder {data_dir}.")
+
+    json_files = select_participants(json_files, shard=args.shard, limit=args.limit, ids=parse_ids(args.ids))
+    if args.shard is not None or args.limit is not None or args.ids:
+        logger.info("Selected %s participants (shard=%s, limit=%s, ids=%s).", len(json_files), args.shard, args.limit, parse_ids(args.ids) or None)
+        dialog_print(f"Selected {len(json_files)} participants for this run.")
+
+    scoring_standards = load_scoring_standards("../scales/scoring_standards.json")
+
+    available_scales = list(scoring_standards.keys())
+    if args.scale is None:
+        selected_scale = choose_scale(available_scales)
+    elif args.scale in available_scales:
+        selected_scale = args.scale
+    else:
+        dialog_print(f"Unknown scale '{args.scale}'; available: {', '.join(available_scales)}.")
+        sys.exit(1)
+
+    logger.info("Selected scale: %s", selected_scale)
     dialog_print(f"You selected scale: {selected_scale}")
 
-    if selected_scale == "PHQ-8":
-        chatprompt = load_chatprompt("../scales/PHQ-8.json")
+    if selected_scale in SCALE_PROMPTS:
+        chatprompt = load_chatprompt(SCALE_PROMPTS[selected_scale])
     else:
         dialog_print("Unsupported scale type.")
         sys.exit(1)
 
-    mode_choice = choose_mode()
+    mode_choice = MODES[args.mode] if args.mode else choose_mode()
     if mode_choice == "2":
         print("Automated test mode enabled.")
         automated = True
     else:
         automated = False
 
-    csv_file_path = "evaluation/72b.csv"
-    for json_file in json_files:
-        process_single_file(json_file, scoring_standards, chatprompt, selected_scale, mode_choice, csv_file_path, automated)
+    # Participants only run concurrently in automated mode; manual mode needs the console.
+    concurrency = args.concurrency if automated else 1
+
+    csv_file_path = args.output
+    if args.shard is not None:
+        csv_file_path = shard_output_path(args.output, *args.shard)
+    if args.queue:
+        run_queue(WorkQueue(args.queue), json_files, scoring_standards, chatprompt, selected_scale, mode_choice, csv_file_path, automated, concurrency)
+    else:
+        run_batch(json_files, scoring_standards, chatprompt, selected_scale, mode_choice, csv_file_path, automated, concurrency)
+
+
+def merge_command(args, logger):
+    sources = args.sources
+    if not sources:
+        if not args.shards:
+            dialog_print("Error: pass the shard result files or --shards N.")
+            sys.exit(1)
+        sources = [shard_output_path(args.output, index, args.shards) for index in range(args.shards)]
+    try:
+        exported = merge_results(sources, args.output)
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        dialog_print(f"Error: {e}")
+        sys.exit(1)
+    logger.info("Merged %s result files into %s (%s participants).", len(sources), args.output, exported)
+    dialog_print(f"Merged {len(sources)} result files into {args.output} ({exported} participants).")
+
+
+def status_command(args):
+    if not os.path.isfile(args.queue):
+        print(f"Error: work queue {args.queue} does not exist.")
+        sys.exit(1)
+    queue = WorkQueue(args.queue)
+    if args.retry_failed:
+        print(f"Returned {queue.retry_failed()} failed participants to pending.")
+    print(format_queue_status(queue))
+
+
+if __name__ == "__main__":
+    parser = build_parser()
+    argv = sys.argv[1:]
+    # Bare options (or no arguments at all) mean "run", so `python main.py` stays interactive.
+    if not argv or argv[0].startswith("-") and argv[0] not in ("-h", "--help"):
+        argv = ["run"] + argv
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        status_command(args)
+        sys.exit(0)
+
+    logger = setup_logging()
+    initialize_dialog_log()
+    logger.info("Psychological assessment program started.")
+
+    if args.command == "merge":
+        merge_command(args, logger)
+        close_dialog_log()
+        sys.exit(0)
+
+    if trace_file:
+        enable_tracing(trace_file)
+
+    run_command(args, logger)
 
+    log_cache_stats()
+    log_necessity_stats()
+    close_tracing()
+    close_clients()
     close_dialog_log()
@@ -1,32 +1,67 @@
-import networkx as nx
-import uuid
-from openai import OpenAI
+from tracing import span
+from logging_setup import payload
+from llm_client import chat_completion
+from rate_limit import LLMUnavailableError
+from entity_extraction import extract_key_info
+from memory_backend import memory_backend, new_graph
 import json
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 base_url = os.getenv("API_BASE_URL", "your_api_base_url_here")
 api_key = os.getenv("API_KEY", "your_api_key_here")
 model_name = os.getenv("API_MODEL", "qwen2.5-72b")
+reassessment_policy = os.getenv("REASSESSMENT_POLICY", "every_topic")
+reassessment_every = int(os.getenv("REASSESSMENT_EVERY", "2"))
+reassessment_divergence = float(os.getenv("REASSESSMENT_DIVERGENCE", "2"))
+# Past topics sent with their full basis per reassessment pass, least recently reviewed
+# first; the rest are listed by score only. 0 sends every completed topic in full.
+reassessment_review_limit = int(os.getenv("REASSESSMENT_REVIEW_LIMIT", "3"))
+compact_context = os.getenv("MEMORY_CONTEXT_COMPACT", "0") == "1"
+# "api" extracts STM entities with the LLM, "local" with entity_extraction only, and
+# "hybrid" calls the LLM only when local extraction finds nothing.
+stm_extraction = os.getenv("STM_EXTRACTION", "api")
+
+REASSESSMENT_POLICIES = ("every_topic", "every_k", "before_summary", "divergent")
+STM_EXTRACTION_MODES = ("api", "local", "hybrid")
 
 class MemoryGraph:
-    def __init__(self, user_identification):
-        self.graph = nx.DiGraph()
+    def __init__(self, user_identification, reassessment_policy=reassessment_policy, reassessment_every=reassessment_every, reassessment_divergence=reassessment_divergence, reassessment_review_limit=reassessment_review_limit, compact_context=compact_context, stm_extraction=stm_extraction, backend=memory_backend):
+        if reassessment_policy not in REASSESSMENT_POLICIES:
+            raise ValueError(f"Unknown reassessment policy '{reassessment_policy}'; expected one of {REASSESSMENT_POLICIES}.")
+        if stm_extraction not in STM_EXTRACTION_MODES:
+            raise ValueError(f"Unknown STM extraction mode '{stm_extraction}'; expected one of {STM_EXTRACTION_MODES}.")
+        self.stm_extraction = stm_extraction
+        self.reassessment_policy = reassessment_policy
+        self.reassessment_every = max(1, reassessment_every)
+        self.reassessment_divergence = reassessment_divergence
+        self.reassessment_review_limit = max(0, reassessment_review_limit)
+        self.compact_context = compact_context
+        self.graph = new_graph(backend)
         self.user_node = "User"
         self.graph.add_node(self.user_node, type="User", info=user_identification)
-        logger.info(f"MemoryGraph initialized for user: {user_identification}")
-        
-        self.client = OpenAI(
-            base_url=base_url, 
-            api_key=api_key
-        )
+        logger.info("MemoryGraph initialized for user: %s", user_identification)
+
+        # Indexes kept up to date on every mutation so prompt building never scans the graph.
+        self._topics = []
+        self._completed_topics = []
+        self._statements = {}
+        self._statement_count = 0
+        self._ltm_fragment = None
+        # Guards the graph and indexes when scoring runs in the background (SCORING_PIPELINE);
+        # API calls are made outside it.
+        self._lock = threading.RLock()
 
     def add_topic(self, topic_name):
-        if not self.graph.has_node(topic_name):
-            self.graph.add_node(topic_name, type="Topic", status="ongoing")
-            self.graph.add_edge(self.user_node, topic_name, relation="assessed_on")
-            logger.info(f"[MemoryGraph] Added new topic: {topic_name}")
+        with self._lock:
+            if not self.graph.has_node(topic_name):
+                self.graph.add_node(topic_name, type="Topic", status="ongoing")
+                self.graph.add_edge(self.user_node, topic_name, relation="assessed_on")
+                self._topics.append(topic_name)
+                self._statements[topic_name] = []
+                logger.info("[MemoryGraph] Added new topic: %s", topic_name)
 
     def extract_key_info_with_api(self, user_response, topic):
         prompt = f"""
@@ -76,17 +111,19 @@ Output:
 ```
 """
         try:
-            completion = self.client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": "You are a psychological assessment assistant. Extract key information strictly as instructed and return JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=512
-            )
-            response = completion.choices[0].message.content.strip()
-            logger.info(f"[MemoryGraph] API extraction response: {response}")
+            with span("extraction"):
+                response = chat_completion(
+                    base_url,
+                    api_key,
+                    model=model_name,
+                    messages=[
+                        {"role": "system", "content": "You are a psychological assessment assistant. Extract key information strictly as instructed and return JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0,
+                    max_tokens=512
+                ).strip()
+            logger.info("[MemoryGraph] API extraction response: %s", payload(response))
 
             if response.startswith("```json"):
                 response = response[len("```json"):].strip()
@@ -112,75 +149,130 @@ Output:
                     extracted_info.append(f"Summary: {summary}")
 
                 key_info = "; ".join(extracted_info)
-                logger.info(f"[MemoryGraph] Extracted key info for topic '{topic}': {key_info}")
+                logger.info("[MemoryGraph] Extracted key info for topic '%s': %s", topic, payload(key_info))
                 return key_info
 
             except json.JSONDecodeError:
-                logger.error(f"[MemoryGraph] Failed to parse API response as JSON: {response}")
+                logger.error("[MemoryGraph] Failed to parse API response as JSON: %s", payload(response))
                 summary = user_response[:20] + ("..." if len(user_response) > 20 else "")
-                logger.info(f"[MemoryGraph] Falling back to default summary: {summary}")
+                logger.info("[MemoryGraph] Falling back to default summary: %s", summary)
                 return f"Summary: {summary}"
 
+        except LLMUnavailableError:
+            raise
         except Exception as e:
-            logger.exception(f"[MemoryGraph] Error calling API for key info extraction: {e}")
+            logger.exception("[MemoryGraph] Error calling API for key info extraction: %s", e)
             summary = user_response[:20] + ("..." if len(user_response) > 20 else "")
-            logger.info(f"[MemoryGraph] Falling back to default summary: {summary}")
+            logger.info("[MemoryGraph] Falling back to default summary: %s", summary)
             return f"Summary: {summary}"
     
-    def add_short_term_memory(self, topic_name, user_response, turn_id):
-        key_info = self.extract_key_info_with_api(user_response, topic_name)
+    def extract_key_info(self, user_response, topic):
+        if self.stm_extraction != "api":
+            key_info = extract_key_info(user_response)
+            if key_info:
+                logger.info("[MemoryGraph] Locally extracted key info for topic '%s': %s", topic, payload(key_info))
+                return key_info
+            if self.stm_extraction == "local":
+                summary = user_response[:20] + ("..." if len(user_response) > 20 else "")
+                logger.info("[MemoryGraph] No entities found locally; using default summary: %s", summary)
+                return f"Summary: {summary}"
+        return self.extract_key_info_with_api(user_response, topic)
 
-        statement_id = f"statement_{uuid.uuid4().hex}"
-        
-        self.graph.add_node(
-            statement_id, 
-            type="Statement", 
-            content=key_info, 
-            source_turn=turn_id 
-        )
-        
-        self.graph.add_edge(topic_name, statement_id, relation="has_statement")
-        logger.info(f"[MemoryGraph] Added STM for '{topic_name}' (Node ID: {statement_id}, Key Info: {key_info})")
-
-    def _trigger_holistic_reassessment(self, new_topic_name, new_topic_score, new_topic_summary, new_topic_statements_str):
-        past_completed_topics = [
-            n for n, d in self.graph.nodes(data=True) 
-            if d.get('type') == 'Topic' 
-            and d.get('status') == 'completed' 
-            and n != new_topic_name
-        ]
-
-        if not past_completed_topics:
-            logger.info(f"[MemoryGraph] No past topics to reassess. '{new_topic_name}' is the first completed topic.")
-            return
-
-        logger.info(f"[MemoryGraph] Triggering HOLISTIC reassessment of {len(past_completed_topics)} past topics based on new info from '{new_topic_name}'.")
-
-        past_assessments_context = []
-        for topic_name in past_completed_topics:
-            node_data = self.graph.nodes[topic_name]
-            past_assessments_context.append({
-                "topic_name": topic_name,
-                "current_score": node_data.get('score'),
-                "current_basis": node_data.get('summary')
-            })
+    def add_short_term_memory(self, topic_name, user_response, turn_id):
+        key_info = self.extract_key_info(user_response, topic_name)
+
+        with self._lock:
+            statement_id = f"statement_{self._statement_count}"
+            self._statement_count += 1
+            self.graph.add_node(
+                statement_id, 
+                type="Statement", 
+                content=key_info, 
+                source_turn=turn_id 
+            )
         
-        new_evidence_context = {
-            "topic_name": new_topic_name,
-            "score": new_topic_score,
-            "summary": new_topic_summary,
-            "supporting_statements": new_topic_statements_str
-        }
+            self.graph.add_edge(topic_name, statement_id, relation="has_statement")
+            self._statements.setdefault(topic_name, []).append(statement_id)
+            logger.info("[MemoryGraph] Added STM for '%s' (Node ID: %s, Key Info: %s)", topic_name, statement_id, payload(key_info))
+
+    def _topic_statements_str(self, topic_name):
+        statements = [f"- {self.graph.nodes[n].get('content')}" for n in self._statements.get(topic_name, [])]
+        return "\n".join(statements)
+
+    def _select_topics_to_review(self, candidates):
+        # Bounds the prompt: at most reassessment_review_limit topics are reviewed in full
+        # per pass, rotating so each completed topic is reviewed in turn.
+        if not self.reassessment_review_limit or len(candidates) <= self.reassessment_review_limit:
+            return candidates, []
+        ordered = sorted(candidates, key=lambda n: self.graph.nodes[n].get("reviewed_pass", 0))
+        selected = set(ordered[:self.reassessment_review_limit])
+        return [n for n in candidates if n in selected], [n for n in candidates if n not in selected]
+
+    def _trigger_holistic_reassessment(self, new_topic_names):
+        # Only topics completed since the last pass (dirty) are sent as new evidence with
+        # their statements. A single new topic is checked against the other completed
+        # topics; a deferred batch is also checked for consistency within itself.
+        with self._lock:
+            if len(new_topic_names) == 1:
+                past_completed_topics = [n for n in self._completed_topics if n not in new_topic_names]
+            else:
+                past_completed_topics = list(self._completed_topics)
+            for topic_name in new_topic_names:
+                self.graph.nodes[topic_name]["dirty"] = False
+
+            if not past_completed_topics:
+                logger.info("[MemoryGraph] No past topics to reassess. %s are the first completed topics.", new_topic_names)
+                return
+
+            past_completed_topics, other_topics = self._select_topics_to_review(past_completed_topics)
+            review_pass = 1 + max((self.graph.nodes[n].get("reviewed_pass", 0) for n in self._completed_topics), default=0)
+            for topic_name in past_completed_topics:
+                self.graph.nodes[topic_name]["reviewed_pass"] = review_pass
+
+            logger.info("[MemoryGraph] Triggering HOLISTIC reassessment of %s past topics based on new info from %s (%s more listed by score only).", len(past_completed_topics), new_topic_names, len(other_topics))
+
+            past_assessments_context = []
+            for topic_name in past_completed_topics:
+                node_data = self.graph.nodes[topic_name]
+                past_assessments_context.append({
+                    "topic_name": topic_name,
+                    "current_score": node_data.get('score'),
+                    "current_basis": node_data.get('summary')
+                })
+
+            new_evidence_context = [
+                {
+                    "topic_name": topic_name,
+                    "score": self.graph.nodes[topic_name].get('score'),
+                    "summary": self.graph.nodes[topic_name].get('summary'),
+                    "supporting_statements": self._topic_statements_str(topic_name)
+                }
+                for topic_name in new_topic_names
+            ]
+            other_topics_context = {topic_name: self.graph.nodes[topic_name].get('score') for topic_name in other_topics}
+        other_topics_section = ""
+        if other_topics_context:
+            other_topics_section = f"""
+【OTHER COMPLETED TOPICS】(Scores only, for context; not under review this time)
+{json.dumps(other_topics_context, ensure_ascii=False)}
+"""
+        if len(new_evidence_context) == 1:
+            new_evidence_context = new_evidence_context[0]
+            completed_note = "A new topic has been completed."
+            evidence_note = "(The newly completed topic)"
+        else:
+            completed_note = "New topics have been completed."
+            evidence_note = "(The newly completed topics)"
 
         holistic_reassessment_prompt = f"""
-You are a clinical psychologist reviewing a patient's assessment. A new topic has been completed. Your task is to perform a consistency check on past assessments and update the `basis` **only if necessary**
+You are a clinical psychologist reviewing a patient's assessment. {completed_note} Your task is to perform a consistency check on past assessments and update the `basis` **only if necessary**
 
-【NEW EVIDENCE】(The newly completed topic)
+【NEW EVIDENCE】{evidence_note}
 {json.dumps(new_evidence_context, indent=2, ensure_ascii=False)}
 
 【PAST ASSESSMENTS TO REVIEW】
 {json.dumps(past_assessments_context, indent=2, ensure_ascii=False)}
-
+{other_topics_section}
 【TASK】
 Your primary goal is to ensure consistency. Do not update the `basis` without a strong reason.
 1.  **Determine Necessity:** For each past topic, ask: Does the "NEW EVIDENCE" directly contradict, supplement, or significantly alter the understanding of this past topic?
@@ -210,19 +302,21 @@ Provide a strict JSON response with a single key "results", which is a list of o
 ```
 """
         try:
-            completion = self.client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": "You are a senior clinical psychologist performing a file review. Output your findings in the specified JSON format only."},
-                    {"role": "user", "content": holistic_reassessment_prompt}
-                ],
-                temperature=0,
-                max_tokens=2048,
-                response_format={"type": "json_object"}
-            )
-            response_str = completion.choices[0].message.content.strip()
+            with span("reassessment"):
+                response_str = chat_completion(
+                    base_url,
+                    api_key,
+                    model=model_name,
+                    messages=[
+                        {"role": "system", "content": "You are a senior clinical psychologist performing a file review. Output your findings in the specified JSON format only."},
+                        {"role": "user", "content": holistic_reassessment_prompt}
+                    ],
+                    temperature=0,
+                    max_tokens=2048,
+                    response_format={"type": "json_object"}
+                ).strip()
             response_data = json.loads(response_str)
-            logger.info(f"[MemoryGraph] Holistic reassessment API response: {json.dumps(response_data, indent=2)}")
+            logger.info("[MemoryGraph] Holistic reassessment API response: %s", payload(response_data))
 
             results = response_data.get("results", [])
             
@@ -230,84 +324,161 @@ Provide a strict JSON response with a single key "results", which is a list of o
                 logger.info("[MemoryGraph] Holistic reassessment complete. No results returned by API.")
                 return
 
-            for result_item in results:
-                topic_to_update = result_item.get("topic_name")
-                if not self.graph.has_node(topic_to_update):
-                    logger.error(f"[MemoryGraph] API suggested action for non-existent topic '{topic_to_update}'. Skipping.")
-                    continue
-                update_flag = result_item.get("update_required")
-                if str(update_flag).lower() == 'true':
-                    new_basis = result_item.get("new_basis")
-                    if new_basis:
-                        nx.set_node_attributes(self.graph, {
-                            topic_to_update: {
+            with self._lock:
+                for result_item in results:
+                    topic_to_update = result_item.get("topic_name")
+                    if not self.graph.has_node(topic_to_update):
+                        logger.error("[MemoryGraph] API suggested action for non-existent topic '%s'. Skipping.", topic_to_update)
+                        continue
+                    if topic_to_update not in past_completed_topics:
+                        logger.warning("[MemoryGraph] API suggested action for '%s', which was not under review. Skipping.", topic_to_update)
+                        continue
+                    update_flag = result_item.get("update_required")
+                    if str(update_flag).lower() == 'true':
+                        new_basis = result_item.get("new_basis")
+                        if new_basis:
+                            self.graph.nodes[topic_to_update].update({
                                 "summary": new_basis
-                            }
-                        })
-                        logger.info(f"[MemoryGraph] Updated basis for topic '{topic_to_update}': {new_basis}")
+                            })
+                            self._ltm_fragment = None
+                            logger.info("[MemoryGraph] Updated basis for topic '%s': %s", topic_to_update, new_basis)
+                        else:
+                            logger.warning("[MemoryGraph] Update required for '%s', but new_basis was not provided. Skipping update.", topic_to_update)
                     else:
-                        logger.warning(f"[MemoryGraph] Update required for '{topic_to_update}', but new_basis was not provided. Skipping update.")
-                else:
-                    logger.info(f"[MemoryGraph] No update required for topic '{topic_to_update}'. Skipping.")
+                        logger.info("[MemoryGraph] No update required for topic '%s'. Skipping.", topic_to_update)
 
+        except LLMUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"[MemoryGraph] FAILED during holistic reassessment. Error: {e}")
+            logger.error("[MemoryGraph] FAILED during holistic reassessment. Error: %s", e)
 
     def convert_topic_to_long_term(self, topic_name, score, summary):
-        if self.graph.has_node(topic_name):
-            nx.set_node_attributes(self.graph, {
-                topic_name: {
+        with self._lock:
+            if self.graph.has_node(topic_name):
+                self.graph.nodes[topic_name].update({
                     "status": "completed",
                     "score": score,
-                    "summary": summary
-                }
-            })
-            logger.info(f"[MemoryGraph] Converted topic '{topic_name}' to LTM with score {score}.")
-        
-        statements = [f"- {self.graph.nodes[n].get('content')}" for n in self.graph.successors(topic_name) if self.graph.nodes[n].get('type') == 'Statement']
-        statements_str = "\n".join(statements)
-
-        self._trigger_holistic_reassessment(topic_name, score, summary, statements_str)
+                    "summary": summary,
+                    "dirty": True
+                })
+                self._completed_topics = [t for t in self._topics if self.graph.nodes[t].get('status') == 'completed']
+                self._ltm_fragment = None
+                logger.info("[MemoryGraph] Converted topic '%s' to LTM with score %s.", topic_name, score)
+            dirty_topics = self._dirty_topics() if self._should_reassess(topic_name, score) else None
+
+        if dirty_topics:
+            self._trigger_holistic_reassessment(dirty_topics)
+
+    def _dirty_topics(self):
+        return [n for n in self._completed_topics if self.graph.nodes[n].get('dirty')]
+
+    def _should_reassess(self, topic_name, score):
+        if self.reassessment_policy == "every_topic":
+            return True
+        if self.reassessment_policy == "every_k":
+            return len(self._dirty_topics()) >= self.reassessment_every
+        if self.reassessment_policy == "divergent":
+            related_scores = [
+                self.graph.nodes[n].get('score') for n in self._completed_topics
+                if n != topic_name and isinstance(self.graph.nodes[n].get('score'), (int, float))
+            ]
+            if related_scores and isinstance(score, (int, float)):
+                mean_score = sum(related_scores) / len(related_scores)
+                if abs(score - mean_score) >= self.reassessment_divergence:
+                    logger.info("[MemoryGraph] Score %s for '%s' diverges from related mean %.2f; reassessing.", score, topic_name, mean_score)
+                    return True
+            self.graph.nodes[topic_name]["dirty"] = False
+            return False
+        return False
+
+    def flush_reassessment(self):
+        # Runs any reassessment still pending under the every_k / before_summary policies.
+        with self._lock:
+            dirty_topics = self._dirty_topics()
+        if dirty_topics:
+            self._trigger_holistic_reassessment(dirty_topics)
 
     def update_topic_score(self, topic_name, updated_score, reason):
+        with self._lock:
+            self._update_topic_score(topic_name, updated_score, reason)
+
+    def _update_topic_score(self, topic_name, updated_score, reason):
         if self.graph.has_node(topic_name) and self.graph.nodes[topic_name].get('status') == 'completed':
-            nx.set_node_attributes(self.graph, {
-                topic_name: {
-                    "updated_score": updated_score,
-                    "update_reason": reason
-                }
+            self.graph.nodes[topic_name].update({
+                "updated_score": updated_score,
+                "update_reason": reason
             })
-            logger.info(f"[MemoryGraph] Updated score for topic '{topic_name}' to {updated_score} with reason: '{reason}'.")
+            self._ltm_fragment = None
+            logger.info("[MemoryGraph] Updated score for topic '%s' to %s with reason: '%s'.", topic_name, updated_score, reason)
         else:
-            logger.warning(f"[MemoryGraph] Attempted to update non-existent or non-completed topic '{topic_name}'.")
-
-    def get_context_for_prompt(self, current_topic):
-        memory_data = {
-            "long_term_memory": [],
-            "short_term_memory": []
+            logger.warning("[MemoryGraph] Attempted to update non-existent or non-completed topic '%s'.", topic_name)
+
+    def to_dict(self):
+        with self._lock:
+            return self._to_dict()
+
+    def _to_dict(self):
+        # Copies, so the snapshot can be serialized while scoring keeps mutating the graph.
+        return {
+            "nodes": [[n, dict(d)] for n, d in self.graph.nodes(data=True)],
+            "edges": [[u, v, dict(d)] for u, v, d in self.graph.edges(data=True)],
+            "topics": list(self._topics),
+            "statements": {topic: list(ids) for topic, ids in self._statements.items()}
         }
 
-        completed_topics = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'Topic' and d.get('status') == 'completed']
-        for topic in completed_topics:
-            attrs = self.graph.nodes[topic]
-            memory_data["long_term_memory"].append({
-                "topic": topic,
-                "score": attrs.get('score', 'N/A'),
-                "summary": attrs.get('summary', 'N/A'),
-                "updated_score": attrs.get('updated_score', None),
-                "update_reason": attrs.get('update_reason', None)
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        nodes = {n: d for n, d in data["nodes"]}
+        memory = cls(nodes.get("User", {}).get("info", ""), **kwargs)
+        for n, d in data["nodes"]:
+            memory.graph.add_node(n, **d)
+        for u, v, d in data["edges"]:
+            memory.graph.add_edge(u, v, **d)
+        memory._topics = list(data["topics"])
+        memory._statements = {topic: list(ids) for topic, ids in data["statements"].items()}
+        memory._statement_count = sum(len(ids) for ids in memory._statements.values())
+        memory._completed_topics = [t for t in memory._topics if memory.graph.nodes[t].get('status') == 'completed']
+        return memory
+
+    def _dump_fragment(self, value):
+        if self.compact_context:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        # Re-indented so the assembled context matches json.dumps(memory_data, indent=2).
+        return json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+    def _long_term_memory_fragment(self):
+        if self._ltm_fragment is None:
+            long_term_memory = []
+            for topic in self._completed_topics:
+                attrs = self.graph.nodes[topic]
+                long_term_memory.append({
+                    "topic": topic,
+                    "score": attrs.get('score', 'N/A'),
+                    "summary": attrs.get('summary', 'N/A'),
+                    "updated_score": attrs.get('updated_score', None),
+                    "update_reason": attrs.get('update_reason', None)
+                })
+            self._ltm_fragment = self._dump_fragment(long_term_memory)
+        return self._ltm_fragment
+
+    def get_context_for_prompt(self, current_topic):
+        with self._lock:
+            return self._context_for_prompt(current_topic)
+
+    def _context_for_prompt(self, current_topic):
+        statements = []
+        for statement_id in self._statements.get(current_topic, []):
+            attrs = self.graph.nodes[statement_id]
+            statements.append({
+                "content": attrs.get('content'),
+                "source_turn": attrs.get('source_turn')
             })
 
-        if self.graph.has_node(current_topic):
-            statements = []
-            for neighbor in self.graph.successors(current_topic):
-                if self.graph.nodes[neighbor].get('type') == 'Statement':
-                    statements.append({
-                        "content": self.graph.nodes[neighbor].get('content'),
-                        "source_turn": self.graph.nodes[neighbor].get('source_turn')
-                    })
-            memory_data["short_term_memory"] = statements
-
-        context = json.dumps(memory_data, ensure_ascii=False, indent=2)
-        logger.info(f"[MemoryGraph] Generated JSON context for topic '{current_topic}': {context}")
-        return context
\ No newline at end of file
+        ltm_fragment = self._long_term_memory_fragment()
+        stm_fragment = self._dump_fragment(statements)
+        if self.compact_context:
+            context = f'{{"long_term_memory":{ltm_fragment},"short_term_memory":{stm_fragment}}}'
+        else:
+            context = f'{{\n  "long_term_memory": {ltm_fragment},\n  "short_term_memory": {stm_fragment}\n}}'
+        logger.debug("[MemoryGraph] Generated JSON context for topic '%s': %s", current_topic, payload(context))
+        return context
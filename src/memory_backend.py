@@ -0,0 +1,78 @@
+# Minimal directed graph used by MemoryGraph in place of networkx.DiGraph. It offers only
+# the subset MemoryGraph and its callers use: has_node, add_node, add_edge, successors,
+# edges(data=True), and graph.nodes[n] / graph.nodes(data=True). Node and edge data are
+# plain dicts, so updates and snapshots stay in C.
+import os
+
+memory_backend = os.getenv("MEMORY_BACKEND", "native")
+
+MEMORY_BACKENDS = ("native", "networkx")
+
+
+class NodeView:
+    __slots__ = ("_nodes",)
+
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def __getitem__(self, node):
+        return self._nodes[node]
+
+    def __call__(self, data=False):
+        return list(self._nodes.items()) if data else list(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class NativeGraph:
+    __slots__ = ("_nodes", "_succ", "nodes")
+
+    def __init__(self):
+        self._nodes = {}
+        self._succ = {}
+        self.nodes = NodeView(self._nodes)
+
+    def has_node(self, node):
+        return node in self._nodes
+
+    def add_node(self, node, **attrs):
+        data = self._nodes.get(node)
+        if data is None:
+            self._nodes[node] = attrs
+            self._succ[node] = {}
+        else:
+            data.update(attrs)
+
+    def add_edge(self, source, target, **attrs):
+        for node in (source, target):
+            if node not in self._nodes:
+                self.add_node(node)
+        self._succ[source].setdefault(target, {}).update(attrs)
+
+    def successors(self, node):
+        return iter(self._succ[node])
+
+    def edges(self, data=False):
+        if data:
+            return [(source, target, attrs) for source, targets in self._succ.items() for target, attrs in targets.items()]
+        return [(source, target) for source, targets in self._succ.items() for target in targets]
+
+    def number_of_nodes(self):
+        return len(self._nodes)
+
+
+def new_graph(backend=None):
+    backend = backend or memory_backend
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend '{backend}'; expected one of {MEMORY_BACKENDS}.")
+    if backend == "networkx":
+        import networkx as nx
+        return nx.DiGraph()
+    return NativeGraph()
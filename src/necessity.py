@@ -0,0 +1,174 @@
+import os
+import re
+import threading
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+# "llm" always asks the NecessityAgent, "hybrid" skips it when the local estimate is
+# confident enough, "shadow" always asks it and only logs how the estimate compares.
+necessity_mode = os.getenv("NECESSITY_MODE", "llm")
+necessity_confidence = float(os.getenv("NECESSITY_CONFIDENCE", "0.8"))
+
+NECESSITY_MODES = ("llm", "hybrid", "shadow")
+
+DENIAL_TERMS = {"no", "nope", "never", "none", "nah", "fine", "okay", "ok", "normal"}
+# Only outright denials; negated forms such as "haven't" or "don't have" usually negate a
+# symptom word ("I haven't slept") and are handled as negations below.
+DENIAL_PHRASES = ("not at all", "no problems", "no issues", "nothing like that")
+UNCERTAIN_PHRASES = ("not sure", "don't know", "dont know", "maybe", "kind of", "sort of", "i guess", "hard to say", "depends")
+HIGH_FREQUENCY_PHRASES = ("every day", "everyday", "every night", "all the time", "always", "constantly", "nearly every", "almost every", "most days", "daily")
+LOW_FREQUENCY_PHRASES = ("sometimes", "occasionally", "rarely", "once", "twice", "a few days", "several days", "couple of days", "now and then", "once in a while")
+DURATION_PHRASES = ("week", "weeks", "month", "months", "year", "years", "days", "since", "lately", "recently", "for a while")
+SYMPTOM_TERMS = {
+    "sad", "down", "depressed", "hopeless", "empty", "crying", "cry", "tired", "exhausted", "fatigue", "energy",
+    "sleep", "slept", "insomnia", "awake", "asleep", "appetite", "eat", "ate", "weight", "worthless", "failure",
+    "guilty", "concentrate", "concentration", "focus", "restless", "slow", "interest", "pleasure", "enjoy", "care",
+    "motivation", "motivated", "anxious", "stress", "stressed", "lonely", "irritable", "numb",
+}
+# Negated, these describe a symptom ("not great", "not good at all").
+POSITIVE_TERMS = {"good", "great", "fine", "okay", "ok", "well", "happy", "normal", "alright"}
+NEGATION_TERMS = {"not", "no", "never", "don't", "dont", "didn't", "haven't", "hasn't", "can't", "cannot", "couldn't", "won't", "isn't", "wasn't", "nothing"}
+# Words shared by every item of the standards, which carry no topic signal.
+STANDARD_STOPWORDS = {
+    "bothered", "not", "all", "at", "by", "for", "or", "over", "the", "past", "two", "weeks", "day", "days", "several",
+    "more", "than", "half", "nearly", "every", "in", "of", "and", "to", "a", "doing", "things", "feeling", "being",
+    "problems", "changes", "difficulties", "issues",
+}
+DENIAL_MAX_WORDS = 8
+_WORD_RE = re.compile(r"[a-z']+")
+_SUFFIXES = ("ingly", "ings", "ing", "edly", "ed", "ies", "es", "ness", "ly", "s")
+
+
+def _words(text):
+    return _WORD_RE.findall(text.lower().replace("’", "'"))
+
+
+def _stem(word):
+    # Crude suffix stripping, enough to match "enjoyed", "sleeping" or "interests" to
+    # the vocabulary; the minimum stem length keeps short words intact.
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if len(word) > 4 and word.endswith("e") else word
+
+
+def _stems(words):
+    return {_stem(w) for w in words}
+
+
+def _has_phrase(text, phrases):
+    return any(re.search(rf"\b{re.escape(phrase)}\b", text) for phrase in phrases)
+
+
+# Rule-based estimate of the NecessityAgent's 0-2 score from the last answer, its length,
+# and the topic's vocabulary in the scoring standards. Returns (score, confidence).
+class NecessityClassifier:
+    def __init__(self, scoring_standards, scale_name):
+        self.symptom_stems = _stems(SYMPTOM_TERMS)
+        self.topic_stems = {}
+        for topic, levels in scoring_standards.get(scale_name, {}).items():
+            terms = set()
+            for description in levels.values():
+                terms.update(w for w in _words(description) if len(w) > 3 and w not in STANDARD_STOPWORDS)
+            terms.update(w for w in _words(topic) if len(w) > 3 and w not in STANDARD_STOPWORDS)
+            self.topic_stems[topic] = _stems(terms)
+
+    def _negated_symptom(self, words, symptom_stems):
+        # A negation followed within three words by a symptom word or a positive word:
+        # "haven't slept", "don't care about", "not great".
+        for i, word in enumerate(words):
+            if word in NEGATION_TERMS or word.endswith("n't"):
+                for following in words[i + 1:i + 4]:
+                    if following in POSITIVE_TERMS or _stem(following) in symptom_stems:
+                        return True
+        return False
+
+    def classify(self, topic, topic_history):
+        answer = topic_history[-1]["response"].strip().lower() if topic_history else ""
+        words = _words(answer)
+        if not words:
+            return 2, 0.6
+
+        symptom_stems = self.symptom_stems | self.topic_stems.get(topic, set())
+        mentions_symptom = any(_stem(w) in symptom_stems for w in words)
+        negated_symptom = self._negated_symptom(words, symptom_stems)
+        denial = (any(w in DENIAL_TERMS for w in words) or _has_phrase(answer, DENIAL_PHRASES)) and not negated_symptom
+        uncertain = _has_phrase(answer, UNCERTAIN_PHRASES)
+        high_frequency = _has_phrase(answer, HIGH_FREQUENCY_PHRASES)
+        low_frequency = _has_phrase(answer, LOW_FREQUENCY_PHRASES)
+        has_duration = _has_phrase(answer, DURATION_PHRASES)
+
+        if uncertain:
+            return (2, 0.7) if len(words) < 12 else (1, 0.55)
+        if denial and not mentions_symptom and not high_frequency and len(words) <= DENIAL_MAX_WORDS:
+            # Kept below the default NECESSITY_CONFIDENCE: a short denial is cheap to
+            # confirm and expensive to misread, so hybrid mode still asks the agent.
+            return 0, 0.7
+        if high_frequency and mentions_symptom:
+            return 2, 0.75
+        if mentions_symptom and (high_frequency or low_frequency) and has_duration and len(words) >= 12:
+            return 0, 0.8
+        if len(words) <= 4 and not denial:
+            return 2, 0.65
+        if mentions_symptom or negated_symptom:
+            return 1, 0.6
+        return 1, 0.4
+
+
+def get_necessity_classifier(scoring_standards, scale_name):
+    if necessity_mode not in NECESSITY_MODES:
+        raise ValueError(f"Unknown necessity mode '{necessity_mode}'; expected one of {NECESSITY_MODES}.")
+    if necessity_mode == "llm":
+        return None
+    return NecessityClassifier(scoring_standards, scale_name)
+
+
+# Per-run counters: LLM calls saved, and agreement with the LLM by confidence band so
+# NECESSITY_CONFIDENCE can be tuned from a shadow run.
+_lock = threading.Lock()
+_saved_calls = 0
+_llm_calls = 0
+_agreement = defaultdict(lambda: [0, 0])
+
+
+def record_local_decision(topic, score, confidence):
+    global _saved_calls
+    with _lock:
+        _saved_calls += 1
+    logger.info("[Necessity] Local score %s (confidence %.2f) for '%s'; NecessityAgent call skipped.", score, confidence, topic)
+
+
+def record_llm_decision(topic, llm_score, local_score=None, confidence=None):
+    global _llm_calls
+    with _lock:
+        _llm_calls += 1
+        if local_score is not None:
+            band = _agreement[round(int(confidence * 10) / 10, 1)]
+            band[0] += local_score == llm_score
+            band[1] += 1
+    if local_score is not None:
+        logger.info("[Necessity] Agreement for '%s': local=%s (confidence %.2f), llm=%s, match=%s", topic, local_score, confidence, llm_score, local_score == llm_score)
+
+
+def format_necessity_stats():
+    with _lock:
+        saved, llm_calls = _saved_calls, _llm_calls
+        agreement = {band: list(counts) for band, counts in _agreement.items()}
+    total = saved + llm_calls
+    if not total:
+        return None
+    lines = [f"Necessity decisions: {total}, NecessityAgent calls saved: {saved} ({saved / total:.0%})"]
+    for band in sorted(agreement):
+        matches, count = agreement[band]
+        lines.append(f"  confidence {band:.1f}-{band + 0.1:.1f}: {matches}/{count} agree with the LLM ({matches / count:.0%})")
+    return "\n".join(lines)
+
+
+def log_necessity_stats():
+    summary = format_necessity_stats()
+    if summary:
+        logger.info(summary)
+        print(f"\n{summary}")
+    return summary
@@ -0,0 +1,241 @@
+import os
+import time
+import random
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+# Budgets per endpoint (base_url); 0 disables the bucket.
+requests_per_minute = float(os.getenv("LLM_RPM", "0"))
+tokens_per_minute = float(os.getenv("LLM_TPM", "0"))
+max_retries = int(os.getenv("LLM_MAX_RETRIES", "5"))
+backoff_base = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+backoff_max = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+# Upper bound on in-flight calls per endpoint, halved on every 429 and grown back by one
+# per window of successes; 0 disables the controller.
+adaptive_concurrency = int(os.getenv("LLM_ADAPTIVE_CONCURRENCY", "0"))
+breaker_threshold = int(os.getenv("LLM_BREAKER_THRESHOLD", "8"))
+breaker_cooldown = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+
+RETRYABLE_ERRORS = ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+                    "TimeoutException", "ConnectError", "ReadError", "RemoteProtocolError")
+
+
+class LLMUnavailableError(RuntimeError):
+    # Raised once retries are exhausted. Call sites must let it propagate instead of
+    # substituting a fallback answer, so the participant is not saved with made-up scores.
+    pass
+
+
+class LLMRequestRejectedError(LLMUnavailableError):
+    # A 4xx other than 429 (bad request, auth, unknown model): retrying cannot help and
+    # every later call would fail the same way, so it stops the participant like an outage.
+    pass
+
+
+def is_retryable(exc):
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(exc).__name__ in RETRYABLE_ERRORS or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def is_rejected(exc):
+    status = getattr(exc, "status_code", None)
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+def is_throttled(exc):
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, hint=None):
+    # Full jitter keeps workers that failed together from retrying in lockstep.
+    delay = random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+    return max(delay, hint) if hint else delay
+
+
+def estimate_tokens(messages, max_tokens=0):
+    # Rough count (4 characters per token) for the TPM budget; exact counting would pull
+    # in tiktoken on every call.
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4 + (max_tokens or 0)
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.available = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        # Requests larger than the bucket wait for a full bucket instead of forever.
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    # AIMD limit on in-flight calls: halve on a 429, add one after `limit` successes.
+    def __init__(self, max_limit):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+        return False
+
+    def on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            new_limit = max(1, self.limit // 2)
+            if new_limit != self.limit:
+                logger.warning("Throttled by the endpoint; concurrency limit %s -> %s.", self.limit, new_limit)
+            self.limit = new_limit
+            self._successes = 0
+
+
+class CircuitBreaker:
+    # Opens after `threshold` consecutive transient failures on an endpoint. While open,
+    # every caller waits out the cooldown, so the whole batch pauses instead of burning
+    # retries; the first call after the cooldown probes the endpoint again.
+    def __init__(self, name, threshold=breaker_threshold, cooldown=breaker_cooldown):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def wait_until_closed(self):
+        while True:
+            with self._lock:
+                if self.opened_at is None:
+                    return
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+                if remaining <= 0:
+                    logger.info("Circuit for %s half-open; probing the endpoint.", self.name)
+                    self.opened_at = None
+                    return
+            time.sleep(min(remaining, 5))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold and self.opened_at is None:
+                self.opened_at = time.monotonic()
+                logger.error("Circuit for %s opened after %s consecutive failures; pausing LLM calls for %.0fs.", self.name, self.failures, self.cooldown)
+
+
+class EndpointLimiter:
+    def __init__(self, name, rpm=requests_per_minute, tpm=tokens_per_minute, concurrency=adaptive_concurrency):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.concurrency = AdaptiveConcurrency(concurrency) if concurrency > 0 else None
+        self.breaker = CircuitBreaker(name)
+
+    def call(self, fn, tokens=0, retries=max_retries, before_retry=None):
+        for attempt in range(retries + 1):
+            self.breaker.wait_until_closed()
+            if self.requests is not None:
+                self.requests.acquire()
+            if self.tokens is not None and tokens:
+                self.tokens.acquire(tokens)
+            try:
+                if attempt and before_retry is not None:
+                    before_retry()
+                if self.concurrency is not None:
+                    with self.concurrency:
+                        result = fn()
+                else:
+                    result = fn()
+            except Exception as e:
+                if is_rejected(e):
+                    raise LLMRequestRejectedError(f"{self.name} rejected the request ({type(e).__name__}): {e}") from e
+                if not is_retryable(e):
+                    raise
+                self.breaker.record_failure()
+                if self.concurrency is not None and is_throttled(e):
+                    self.concurrency.on_throttle()
+                if attempt == retries:
+                    raise LLMUnavailableError(f"{self.name} still failing after {retries + 1} attempts: {e}") from e
+                delay = backoff_delay(attempt, retry_after(e))
+                logger.warning("Transient error from %s (%s: %s); retry %s/%s in %.1fs.", self.name, type(e).__name__, e, attempt + 1, retries, delay)
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            if self.concurrency is not None:
+                self.concurrency.on_success()
+            return result
+
+
+_limiters = {}
+_lock = threading.Lock()
+# Agents without an endpoint (llm_config=False, replies registered in code) spend no
+# budget, so they share one limiter with the buckets and concurrency cap turned off.
+_local_limiter = EndpointLimiter("local", rpm=0, tpm=0, concurrency=0)
+
+
+def get_limiter(base_url):
+    name = base_url or "default"
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.setdefault(name, EndpointLimiter(name))
+    return limiter
+
+
+def endpoint_config(agent):
+    # First config_list entry of the agent's llm_config, or None if it has no endpoint.
+    llm_config = agent.llm_config
+    if not isinstance(llm_config, dict) or not llm_config.get("config_list"):
+        return None
+    return llm_config["config_list"][0]
+
+
+def limiter_for_agent(agent):
+    config = endpoint_config(agent)
+    if config is None:
+        return _local_limiter
+    return get_limiter(config.get("base_url"))
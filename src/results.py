@@ -0,0 +1,190 @@
+import csv
+import json
+import os
+import time
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAX_ITEMS = 8
+RESULT_COLUMNS = ["identifier", "total", "classes"] + [f"item{i}" for i in range(1, MAX_ITEMS + 1)]
+
+
+def build_result_row(identifier, overall_score, symptom_level, updated_scores):
+    data = {
+        "identifier": identifier,
+        "classes": symptom_level,
+        "total": overall_score
+    }
+    score_values = {topic: details["score"] for topic, details in updated_scores.items()}
+    for idx, (topic, score) in enumerate(score_values.items(), 1):
+        data[f"item{idx}"] = score
+    for i in range(1, MAX_ITEMS + 1):
+        data.setdefault(f"item{i}", 0)
+    return data
+
+
+def read_csv_rows(csv_file):
+    with open(csv_file, "r", encoding="utf-8", newline="") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("identifier")]
+    for row in rows:
+        for column in RESULT_COLUMNS[1:]:
+            if row.get(column) not in (None, ""):
+                try:
+                    row[column] = int(float(row[column]))
+                except ValueError:
+                    pass
+    return rows
+
+
+def store_path_for_csv(csv_file):
+    return os.path.splitext(csv_file)[0] + ".jsonl"
+
+
+# Append-only JSONL results log with an in-memory identifier index. Each upsert is one
+# appended line (the latest line per identifier wins), so saving a participant never
+# rewrites earlier results. Lines appended by other processes are picked up
+# incrementally on lookup.
+class ResultsStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._offset = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._refresh()
+
+    @classmethod
+    def for_csv(cls, csv_file):
+        store = cls(store_path_for_csv(csv_file))
+        if not store._rows and os.path.isfile(csv_file):
+            store.import_csv(csv_file)
+        return store
+
+    @staticmethod
+    def _key(identifier):
+        return str(identifier).strip()
+
+    def _refresh(self):
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A trailing line without a newline is still being written by another process.
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Skipping corrupt line in results store %s.", self.path)
+                continue
+            self._rows[self._key(row.get("identifier"))] = row
+        self._offset += len(complete)
+
+    def _append(self, rows):
+        payload = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+        with open(self.path, "ab") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def is_evaluated(self, identifier):
+        with self._lock:
+            self._refresh()
+            return self._key(identifier) in self._rows
+
+    def save(self, identifier, overall_score, symptom_level, updated_scores):
+        row = build_result_row(identifier, overall_score, symptom_level, updated_scores)
+        row["updated_at"] = time.time()
+        with self._lock:
+            self._refresh()
+            existed = self._key(identifier) in self._rows
+            # A failed write propagates, so the caller keeps the participant's checkpoint.
+            self._append([row])
+            self._refresh()
+        logger.info("%s evaluation results for %s.", "Updated" if existed else "Appended", identifier)
+
+    def rows(self):
+        with self._lock:
+            self._refresh()
+            return list(self._rows.values())
+
+    def import_csv(self, csv_file):
+        rows = read_csv_rows(csv_file)
+        with self._lock:
+            self._append(rows)
+            self._refresh()
+        logger.info("Imported %s existing results from %s into %s.", len(rows), csv_file, self.path)
+
+    def import_rows(self, rows):
+        # Appends only rows that differ from what the store already holds, so merging the
+        # same shards twice does not grow the log.
+        with self._lock:
+            self._refresh()
+            new_rows = [row for row in rows if self._rows.get(self._key(row.get("identifier"))) != row]
+            if new_rows:
+                self._append(new_rows)
+                self._refresh()
+        return len(new_rows)
+
+    def export_csv(self, csv_file):
+        rows = self.rows()
+        directory = os.path.dirname(csv_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Per-process temp name: workers sharing an output may export at the same time.
+        tmp_file = f"{csv_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_file, csv_file)
+        logger.info("Exported %s results to %s", len(rows), csv_file)
+        return len(rows)
+
+
+def _load_source(path):
+    # A shard's JSONL store is preferred over its CSV export: it carries updated_at and
+    # also holds participants finished after the last export.
+    if path.endswith(".jsonl"):
+        return ResultsStore(path).rows()
+    store_path = store_path_for_csv(path)
+    if os.path.isfile(store_path):
+        return ResultsStore(store_path).rows()
+    return read_csv_rows(path)
+
+
+def merge_results(sources, csv_file):
+    merged = {}
+    for path in sources:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Result file {path} does not exist.")
+        rows = _load_source(path)
+        logger.info("Merging %s results from %s.", len(rows), path)
+        for row in rows:
+            key = ResultsStore._key(row.get("identifier"))
+            current = merged.get(key)
+            if current is not None and current != row:
+                logger.warning("Participant %s appears in several result files; keeping the most recent row.", key)
+            if current is None or float(row.get("updated_at") or 0) >= float(current.get("updated_at") or 0):
+                merged[key] = row
+    store = ResultsStore.for_csv(csv_file)
+    store.import_rows(list(merged.values()))
+    return store.export_csv(csv_file)
@@ -0,0 +1,82 @@
+import pytest
+
+import token_ledger
+from dispatcher import DirectDispatcher
+from token_ledger import get_token_ledger
+
+
+@pytest.fixture
+def tokenized(monkeypatch):
+    seen = []
+
+    def fake_count_token(messages, model=None):
+        seen.extend(message["content"] for message in messages)
+        return sum(len(message["content"].split()) + 3 for message in messages) + 3
+
+    monkeypatch.setattr(token_ledger, "count_token", fake_count_token)
+    return seen
+
+
+def _dispatcher(turns):
+    dispatcher = DirectDispatcher([])
+    dispatcher.messages = [{"content": f"turn {i} of the interview", "role": "user", "name": "UserProxy"} for i in range(turns)]
+    return dispatcher
+
+
+def test_fork_reuses_token_counts(tokenized):
+    dispatcher = _dispatcher(20)
+    total = get_token_ledger(dispatcher).sync(dispatcher.messages)
+    tokenized.clear()
+
+    forked = dispatcher.fork()
+    assert get_token_ledger(forked).sync(forked.messages) == total
+    assert tokenized == []
+
+    forked.messages.append({"content": "score this topic", "role": "user", "name": "UserProxy"})
+    get_token_ledger(forked).sync(forked.messages)
+    assert tokenized == ["score this topic"]
+
+
+def test_fork_ledger_is_independent(tokenized):
+    dispatcher = _dispatcher(20)
+    total = get_token_ledger(dispatcher).sync(dispatcher.messages)
+
+    forked = dispatcher.fork()
+    get_token_ledger(forked).trim(forked.messages, total // 2)
+
+    assert len(dispatcher.messages) == 20
+    assert get_token_ledger(dispatcher).sync(dispatcher.messages) == total
+
+
+class LocalAgent:
+    # No endpoint: answers through generate_reply, like the registered-reply agents.
+    llm_config = False
+
+    def __init__(self, name, reply=None, error=None):
+        self.name = name
+        self.reply = reply
+        self.error = error
+
+    def generate_reply(self, messages):
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+
+def test_request_appends_prompt_and_reply():
+    dispatcher = _dispatcher(2)
+    assert dispatcher.request(LocalAgent("ScoringAgent", reply="2"), "score this topic") == "2"
+    assert [message["content"] for message in dispatcher.messages[2:]] == ["score this topic", "2"]
+    assert dispatcher.messages[-1]["name"] == "ScoringAgent"
+
+
+@pytest.mark.parametrize("agent", [
+    LocalAgent("ScoringAgent", error=ValueError("bad reply")),
+    LocalAgent("ScoringAgent", reply=None),
+])
+def test_failed_request_leaves_history_unchanged(agent):
+    dispatcher = _dispatcher(2)
+    history = list(dispatcher.messages)
+    with pytest.raises(Exception):
+        dispatcher.request(agent, "score this topic")
+    assert dispatcher.messages == history
@@ -0,0 +1,40 @@
+import pytest
+
+from entity_extraction import extract_entities, extract_key_info
+
+
+# Everyday phrases that share a word with the lexicons.
+@pytest.mark.parametrize("text", ["Please sit down.", "The content was fine.", "That's life.", "It does not work.", "I'm down to two meals.",
+                                  "My weight has been stable."])
+def test_incidental_words_are_not_entities(text):
+    assert extract_key_info(text) == ""
+
+
+@pytest.mark.parametrize("text", ["I never feel happy.", "I'm not happy.", "Nothing brings me joy."])
+def test_negated_emotion_is_kept(text):
+    entities = extract_entities(text)
+    assert entities["Emotion"] == ["not happiness"]
+    assert entities["Frequency"] == []
+
+
+def test_negated_symptom_is_kept():
+    assert extract_entities("I don't have insomnia.")["Symptom"] == ["no insomnia"]
+
+
+def test_affirmative_answer():
+    assert extract_key_info("I have been feeling down and tired most days for two weeks, it affects my work.") == (
+        "Emotion: sadness; Frequency: nearly every day; Symptom: fatigue; Duration: for two weeks; Impact: work"
+    )
+
+
+def test_quantity_is_not_a_frequency():
+    assert extract_key_info("I work a lot and I am always tired.") == "Frequency: always; Symptom: fatigue"
+
+
+def test_negated_sleep_and_bare_duration():
+    assert extract_key_info("I haven't been sleeping well for weeks.") == "Symptom: insomnia; Duration: for weeks"
+
+
+@pytest.mark.parametrize("text", ["I've lost weight.", "I have been losing a lot of weight.", "My weight has gone up."])
+def test_weight_change_needs_a_change(text):
+    assert extract_entities(text)["Symptom"] == ["weight change"]
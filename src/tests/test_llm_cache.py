@@ -0,0 +1,17 @@
+from llm_cache import LLMCache
+
+MESSAGES = [{"role": "user", "content": "How have you been sleeping?"}]
+
+
+def test_key_depends_on_endpoint():
+    local = LLMCache.make_key("http://localhost:8000/v1", "qwen", MESSAGES, {"temperature": 0})
+    remote = LLMCache.make_key("http://remote:8000/v1", "qwen", MESSAGES, {"temperature": 0})
+    assert local != remote
+    assert local == LLMCache.make_key("http://localhost:8000/v1", "qwen", MESSAGES, {"temperature": 0})
+
+
+def test_entries_are_not_shared_across_endpoints(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    cache.set(LLMCache.make_key("http://a/v1", "qwen", MESSAGES, {}), "Not well.")
+    assert cache.get(LLMCache.make_key("http://b/v1", "qwen", MESSAGES, {})) is None
+    assert cache.get(LLMCache.make_key("http://a/v1", "qwen", MESSAGES, {})) == "Not well."
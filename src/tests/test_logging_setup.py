@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Writes part of a topic to the global and a per-session transcript, then exits the
+# way get_valid_input does on EOF, without closing either log.
+SCRIPT = textwrap.dedent("""
+    import sys
+    from logging_setup import initialize_dialog_log, initialize_session_dialog_log, dialog_print, dialog_record
+    import logging_setup
+
+    log_dir = sys.argv[1]
+    initialize_dialog_log(log_dir)
+    dialog_print("global line")
+    initialize_session_dialog_log("p1", log_dir)
+    for i in range(50):
+        dialog_print(f"session line {i}")
+        dialog_record("patient", f"answer {i}", topic="Sleep Problems", depth=i)
+    logging_setup._session.file = None
+    dialog_print("global after session")
+    sys.exit(1)
+""")
+
+
+@pytest.mark.parametrize("background", ["0", "1"])
+def test_exit_mid_topic_keeps_every_line(tmp_path, background):
+    env = dict(os.environ, TRANSCRIPT_FLUSH_INTERVAL="3600", TRANSCRIPT_BACKGROUND=background)
+    result = subprocess.run([sys.executable, "-c", SCRIPT, str(tmp_path)], cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 1, result.stderr
+
+    files = {name: (tmp_path / name).read_text(encoding="utf-8") for name in os.listdir(tmp_path)}
+    global_text = next(text for name, text in files.items() if name.startswith("dialog_model_") and name.endswith(".txt"))
+    session_text = next(text for name, text in files.items() if name.startswith("dialog_p1_") and name.endswith(".txt"))
+    session_records = next(text for name, text in files.items() if name.startswith("dialog_p1_") and name.endswith(".jsonl"))
+
+    assert global_text.splitlines() == ["global line", "global after session"]
+    assert session_text.splitlines() == [f"session line {i}" for i in range(50)]
+    assert [json.loads(line)["text"] for line in session_records.splitlines()] == [f"answer {i}" for i in range(50)]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import memory
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    sent = []
+
+    def fake_chat_completion(base_url, api_key, model, messages, **kwargs):
+        sent.append(messages[1]["content"])
+        return json.dumps({"results": []})
+
+    monkeypatch.setattr(memory, "chat_completion", fake_chat_completion)
+    return sent
+
+
+def _complete_topics(graph, count):
+    for i in range(count):
+        topic = f"Topic {i}"
+        graph.add_topic(topic)
+        graph.add_short_term_memory(topic, "I feel tired most days.", 1)
+        graph.convert_topic_to_long_term(topic, i % 4, f"Basis for topic {i}.")
+
+
+def _reviewed(prompt):
+    review = prompt.split("【PAST ASSESSMENTS TO REVIEW】")[1].split("【")[0]
+    return [item["topic_name"] for item in json.loads(review)]
+
+
+def test_review_is_bounded_and_rotates(prompts):
+    graph = memory.MemoryGraph("user", reassessment_policy="every_topic", reassessment_review_limit=2, stm_extraction="local")
+    _complete_topics(graph, 6)
+
+    assert all(len(_reviewed(prompt)) <= 2 for prompt in prompts)
+    # Topics not under review are still listed, by score only.
+    assert '"Topic 0": 0' in prompts[-1] or "Topic 0" in _reviewed(prompts[-1])
+    reviewed = {topic for prompt in prompts for topic in _reviewed(prompt)}
+    assert reviewed == {f"Topic {i}" for i in range(5)}
+
+
+def test_limit_zero_reviews_every_completed_topic(prompts):
+    graph = memory.MemoryGraph("user", reassessment_policy="every_topic", reassessment_review_limit=0, stm_extraction="local")
+    _complete_topics(graph, 5)
+
+    assert _reviewed(prompts[-1]) == [f"Topic {i}" for i in range(4)]
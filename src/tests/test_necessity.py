@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+from necessity import NecessityClassifier, necessity_confidence
+
+STANDARDS = os.path.join(os.path.dirname(__file__), "..", "..", "scales", "scoring_standards.json")
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    with open(STANDARDS, encoding="utf-8") as f:
+        return NecessityClassifier(json.load(f), "PHQ-8")
+
+
+def classify(classifier, topic, answer):
+    return classifier.classify(topic, [{"question": "", "response": answer}])
+
+
+# Negated or inflected symptoms used to read as denials and skip the NecessityAgent.
+@pytest.mark.parametrize("topic, answer", [
+    ("Sleep Problems", "I haven't slept in days"),
+    ("Loss of Interest", "No, I just don't care about anything anymore"),
+    ("Loss of Interest", "I haven't enjoyed anything for months"),
+    ("Depressed Mood", "not great honestly"),
+])
+def test_negated_symptom_is_not_a_confident_denial(classifier, topic, answer):
+    score, confidence = classify(classifier, topic, answer)
+    assert score != 0 or confidence < necessity_confidence
+
+
+@pytest.mark.parametrize("answer", ["No, not at all.", "Nope, nothing like that.", "no problems there"])
+def test_plain_denial_still_scores_zero(classifier, answer):
+    score, _ = classify(classifier, "Sleep Problems", answer)
+    assert score == 0
+
+
+def test_denial_confidence_defers_to_agent(classifier):
+    _, confidence = classify(classifier, "Depressed Mood", "No.")
+    assert confidence < necessity_confidence
@@ -0,0 +1,51 @@
+import pytest
+
+import rate_limit
+from rate_limit import EndpointLimiter, LLMRequestRejectedError, LLMUnavailableError
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+def _failing(status_code, attempts):
+    def fn():
+        attempts.append(status_code)
+        raise APIStatusError(status_code)
+    return fn
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt, hint=None: 0)
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 403, 404])
+def test_rejected_requests_are_not_retried(status_code):
+    attempts = []
+    with pytest.raises(LLMRequestRejectedError):
+        EndpointLimiter("test", rpm=0, tpm=0, concurrency=0).call(_failing(status_code, attempts), retries=3)
+    assert attempts == [status_code]
+
+
+def test_rejected_requests_stop_like_an_outage():
+    # Call sites re-raise LLMUnavailableError instead of substituting a fallback answer.
+    assert issubclass(LLMRequestRejectedError, LLMUnavailableError)
+
+
+def test_server_errors_are_retried():
+    attempts = []
+    with pytest.raises(LLMUnavailableError) as excinfo:
+        EndpointLimiter("test", rpm=0, tpm=0, concurrency=0).call(_failing(503, attempts), retries=2)
+    assert not isinstance(excinfo.value, LLMRequestRejectedError)
+    assert len(attempts) == 3
+
+
+def test_other_errors_propagate_unchanged():
+    def fn():
+        raise ValueError("bad reply")
+
+    with pytest.raises(ValueError):
+        EndpointLimiter("test", rpm=0, tpm=0, concurrency=0).call(fn)
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+import assessment
+from results import ResultsStore
+
+
+def _failing_append(rows):
+    raise OSError("disk full")
+
+
+def test_save_propagates_write_errors(tmp_path, monkeypatch):
+    store = ResultsStore(str(tmp_path / "results.jsonl"))
+    monkeypatch.setattr(store, "_append", _failing_append)
+    with pytest.raises(OSError):
+        store.save("300", 5, "Mild", {})
+    assert not store.is_evaluated("300")
+
+
+def test_failed_save_keeps_checkpoint(tmp_path, monkeypatch):
+    checkpoint = tmp_path / "300.json"
+    checkpoint.write_text("{}", encoding="utf-8")
+    monkeypatch.setattr(assessment, "checkpoint_file", lambda identifier: str(tmp_path / f"{identifier}.json"))
+    monkeypatch.setattr(assessment, "load_real_data", lambda path, scale: ("300", [], {}))
+    monkeypatch.setattr(assessment, "setup_agents", lambda chatprompt: None)
+    monkeypatch.setattr(assessment, "perform_assessment", lambda **kwargs: ("report", 5, "Mild", {}))
+    store = ResultsStore(str(tmp_path / "results.jsonl"))
+    monkeypatch.setattr(store, "_append", _failing_append)
+
+    assert assessment.process_single_file("300.json", {}, {}, "PHQ-8", "2", store) is False
+    assert os.path.exists(checkpoint)
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+import batch
+from work_queue import LeaseKeeper, LeaseLostError, WorkQueue
+
+
+def _steal_lease(queue, identifier, thief):
+    # Expire the current lease and let another worker claim the task.
+    queue._connection().execute("UPDATE tasks SET lease_expires = 0 WHERE identifier = ?", (identifier,))
+    assert queue.claim(thief)[0] == identifier
+    # The new holder keeps the task for the rest of the test.
+    queue._connection().execute("UPDATE tasks SET lease_expires = ? WHERE identifier = ?", (time.time() + 60, identifier))
+
+
+def _wait_until_lost(check, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            check()
+        except LeaseLostError:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_keeper_check_raises_once_lease_is_lost(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease=0.3)
+    queue.enqueue([("p1", "p1.json")])
+    queue.claim("worker-a")
+    with LeaseKeeper(queue, "p1", "worker-a") as keeper:
+        keeper.check()
+        _steal_lease(queue, "p1", "worker-b")
+        assert _wait_until_lost(keeper.check)
+
+
+def test_worker_stops_and_leaves_task_to_new_holder(tmp_path, monkeypatch):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease=0.3)
+    queue.enqueue([("p1", "p1.json")])
+    boundaries = []
+
+    def fake_process_single_file(json_file, *args, check_interrupted=None, **kwargs):
+        # Stands in for perform_assessment: the lease is lost mid-run, and the next
+        # topic boundary has to stop the task.
+        _steal_lease(queue, "p1", "worker-b")
+        boundaries.append(_wait_until_lost(check_interrupted))
+        return False
+
+    monkeypatch.setattr(batch, "process_single_file", fake_process_single_file)
+    processed = batch._drain_queue(queue, "worker-a", {}, {}, "PHQ-8", "2", True, None, False)
+
+    assert processed == 1
+    assert boundaries == [True]
+    counts, leased, _ = queue.status()
+    # Neither completed nor failed by the worker that lost it.
+    assert counts["leased"] == 1 and leased[0][1] == "worker-b"
+    assert leased[0][3] == 2
@@ -0,0 +1,71 @@
+from collections import deque
+from itertools import islice
+
+# count_token() on a message list adds 3 tokens per message plus 3 for reply priming,
+# so per-message counts exclude the priming and the ledger adds it back once.
+REPLY_PRIMING_TOKENS = 3
+
+
+def count_token(input, model="gpt-3.5-turbo-0613"):
+    # autogen's counter pulls in tiktoken, so it is imported on first use.
+    from autogen.token_count_utils import count_token as _count_token
+    return _count_token(input, model)
+
+
+def count_message_tokens(message):
+    return count_token([message]) - REPLY_PRIMING_TOKENS
+
+
+class TokenLedger:
+    def __init__(self):
+        self._counts = deque()
+        self._head = None
+        self._messages_tokens = 0
+
+    @property
+    def total(self):
+        return self._messages_tokens + REPLY_PRIMING_TOKENS
+
+    def reset(self):
+        self._counts.clear()
+        self._head = None
+        self._messages_tokens = 0
+
+    def copy(self):
+        # Counts are kept per message object, so a copy stays valid for a shallow copy of
+        # the same history and only tokenizes what is appended to it afterwards.
+        ledger = TokenLedger()
+        ledger._counts = deque(self._counts)
+        ledger._head = self._head
+        ledger._messages_tokens = self._messages_tokens
+        return ledger
+
+    def sync(self, messages):
+        # Messages are only ever appended at the tail or trimmed through this ledger; a
+        # shorter list or a different head means the history was reset elsewhere.
+        if len(messages) < len(self._counts) or (self._counts and messages[0] is not self._head):
+            self.reset()
+        for message in islice(messages, len(self._counts), None):
+            tokens = count_message_tokens(message)
+            self._counts.append(tokens)
+            self._messages_tokens += tokens
+        self._head = messages[0] if messages else None
+        return self.total
+
+    def trim(self, messages, budget):
+        removed = 0
+        while self.total > budget and len(self._counts) > 1:
+            self._messages_tokens -= self._counts.popleft()
+            removed += 1
+        if removed:
+            del messages[:removed]
+            self._head = messages[0]
+        return removed
+
+
+def get_token_ledger(groupchat):
+    ledger = getattr(groupchat, "token_ledger", None)
+    if ledger is None:
+        ledger = TokenLedger()
+        groupchat.token_ledger = ledger
+    return ledger
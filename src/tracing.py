@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import threading
+import contextvars
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+trace_file = os.getenv("TRACE_FILE")
+
+AGENT_STAGES = {
+    "QuestionAgent": "question",
+    "NecessityAgent": "necessity",
+    "ScoringAgent": "scoring",
+    "SummaryAgent": "summary",
+}
+
+_enabled = False
+_output = None
+_lock = threading.Lock()
+_latencies = defaultdict(list)
+_ttfts = defaultdict(list)
+_participant_calls = defaultdict(int)
+_context = contextvars.ContextVar("trace_context", default={})
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("record", "_start", "_token")
+    active = True
+
+    def __init__(self, stage, attrs):
+        self.record = {"stage": stage, **_context.get(), **attrs}
+        self._start = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.record.update(attrs)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        latency = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        self.record["latency_ms"] = round(latency * 1000, 3)
+        self.record["ts"] = time.time()
+        if exc_type is not None:
+            self.record["error"] = exc_type.__name__
+        _emit(self.record)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+    active = False
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage, **attrs):
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(stage, attrs)
+
+
+def current_span():
+    return _current_span.get() or _NOOP_SPAN
+
+
+def set_trace_context(**fields):
+    return _context.set({**_context.get(), **fields})
+
+
+def reset_trace_context(token):
+    _context.reset(token)
+
+
+class trace_context:
+    def __init__(self, **fields):
+        self._fields = fields
+        self._token = None
+
+    def __enter__(self):
+        self._token = set_trace_context(**self._fields)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        reset_trace_context(self._token)
+        return False
+
+
+def enable_tracing(path=None):
+    global _enabled, _output
+    with _lock:
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _output = open(path, "a", encoding="utf-8")
+        _enabled = True
+    if path:
+        logger.info("Tracing enabled; spans written to %s.", path)
+    else:
+        logger.info("Tracing enabled.")
+
+
+def _emit(record):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        _latencies[record["stage"]].append(record["latency_ms"])
+        if record.get("ttft_ms") is not None:
+            _ttfts[record["stage"]].append(record["ttft_ms"])
+        participant = record.get("participant")
+        if participant is not None:
+            _participant_calls[participant] += 1
+        if _output is not None:
+            _output.write(line + "\n")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def format_summary():
+    with _lock:
+        latencies = {stage: list(values) for stage, values in _latencies.items()}
+        ttfts = {stage: list(values) for stage, values in _ttfts.items()}
+        participants = len(_participant_calls)
+    if not latencies:
+        return "No spans recorded."
+    lines = [f"{'stage':<14} {'calls':>7} {'calls/part':>11} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9}"]
+    for stage, values in sorted(latencies.items(), key=lambda item: -sum(item[1])):
+        per_participant = f"{len(values) / participants:.1f}" if participants else "-"
+        lines.append(f"{stage:<14} {len(values):>7} {per_participant:>11} {_percentile(values, 50):>10.1f} {_percentile(values, 95):>10.1f} {sum(values) / 1000:>9.1f}")
+    for stage, values in sorted(ttfts.items()):
+        lines.append(f"time to first token ({stage}): p50 {_percentile(values, 50):.1f} ms, p95 {_percentile(values, 95):.1f} ms over {len(values)} streamed calls")
+    return "\n".join(lines)
+
+
+def close_tracing():
+    global _enabled, _output
+    if not _enabled:
+        return
+    summary = format_summary()
+    logger.info("Trace summary:\n%s", summary)
+    print(f"\nPer-stage trace summary:\n{summary}")
+    with _lock:
+        if _output is not None:
+            _output.close()
+            _output = None
+        _enabled = False
@@ -0,0 +1,85 @@
+import re
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+INTERVIEWER_ROLES = {"ellie", "interviewer", "therapist"}
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "do", "does", "for", "from", "had", "has", "have",
+    "how", "i", "if", "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "this", "to",
+    "uh", "um", "was", "we", "were", "what", "when", "with", "you", "your",
+}
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def split_exchanges(real_interview):
+    # An exchange is an interviewer turn plus the participant turns that follow it.
+    exchanges = []
+    current = []
+    for para in real_interview:
+        role = para.get("roleName", "Unknown role")
+        if role.lower() in INTERVIEWER_ROLES and current and current[-1][0].lower() not in INTERVIEWER_ROLES:
+            exchanges.append(current)
+            current = []
+        current.append((role, para.get("content", "")))
+    if current:
+        exchanges.append(current)
+    return ["".join(f"{role}: {content}\n" for role, content in exchange) for exchange in exchanges]
+
+
+# Okapi BM25 over the exchanges of one interview, built once per participant.
+class TranscriptIndex:
+    def __init__(self, real_interview, k1=1.5, b=0.75):
+        import numpy as np
+
+        self._np = np
+        self.exchanges = split_exchanges(real_interview)
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)
+        lengths = []
+        for doc_id, text in enumerate(self.exchanges):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                self._postings[token][doc_id] = self._postings[token].get(doc_id, 0) + 1
+        self._lengths = np.asarray(lengths, dtype=np.float64)
+        self._avg_length = float(self._lengths.mean()) if lengths else 0.0
+        self._norm = k1 * (1 - b + b * self._lengths / (self._avg_length or 1.0))
+        n_docs = len(self.exchanges)
+        self._idf = {
+            token: float(np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5)))
+            for token, docs in self._postings.items()
+        }
+        logger.debug("Indexed %d exchanges (%d terms).", n_docs, len(self._postings))
+
+    def __len__(self):
+        return len(self.exchanges)
+
+    def scores(self, query):
+        np = self._np
+        scores = np.zeros(len(self.exchanges))
+        for token in set(tokenize(query)):
+            docs = self._postings.get(token)
+            if not docs:
+                continue
+            doc_ids = np.fromiter(docs.keys(), dtype=np.int64, count=len(docs))
+            tf = np.fromiter(docs.values(), dtype=np.float64, count=len(docs))
+            scores[doc_ids] += self._idf[token] * tf * (self.k1 + 1) / (tf + self._norm[doc_ids])
+        return scores
+
+    def top_k(self, query, k):
+        # Hits are returned in interview order so the excerpt still reads as a dialogue.
+        np = self._np
+        if not self.exchanges or k <= 0:
+            return []
+        scores = self.scores(query)
+        k = min(k, len(self.exchanges))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        hits = sorted(int(i) for i in candidates if scores[i] > 0)
+        return [self.exchanges[i] for i in hits]
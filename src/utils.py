@@ -4,14 +4,17 @@ import os
 import sys
 import contextlib
 import logging
-import pandas as pd
+import threading
 from data_load import load_scoring_standards
-from logging_setup import dialog_print
+from logging_setup import dialog_print, payload
 from config import get_llm_config
-from autogen.token_count_utils import count_token
+from results import ResultsStore
+from token_ledger import get_token_ledger, count_token
+from dispatcher import DirectDispatcher
+from tracing import span, AGENT_STAGES
+from rate_limit import LLMUnavailableError, limiter_for_agent
 
 logger = logging.getLogger(__name__)
-llm_config = get_llm_config()
 
 
 def parse_personal_info(response):
@@ -132,6 +135,42 @@ def extract_score_and_summary(text, scale_name):
         return 0, ""
 
 
+_JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", '"': '"', "\\": "\\", "/": "/"}
+
+
+# Decoded value of a string field in a JSON reply that may still be arriving; stops at
+# the first incomplete escape so the result only ever grows as more text comes in.
+def partial_json_string(text, field):
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(field), text)
+    if not match:
+        return ""
+    chars = []
+    i = match.end()
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            break
+        if ch == "\\":
+            if i + 1 >= len(text):
+                break
+            escape = text[i + 1]
+            if escape == "u":
+                if i + 6 > len(text):
+                    break
+                try:
+                    chars.append(chr(int(text[i + 2:i + 6], 16)))
+                except ValueError:
+                    break
+                i += 6
+                continue
+            chars.append(_JSON_ESCAPES.get(escape, escape))
+            i += 2
+            continue
+        chars.append(ch)
+        i += 1
+    return "".join(chars)
+
+
 def extract_summary_and_updated_scores(text, scale_name):
     try:
         if text.startswith("```json"):
@@ -184,6 +223,8 @@ def generate_score_table(memory_graph, topics, symptom_level):
 
     total_score = sum(item["final_score"] for item in table_data)
 
+    import pandas as pd
+
     df = pd.DataFrame({
         "No.": range(1, len(table_data) + 1),
         "Item": [item["topic"] for item in table_data],
@@ -217,68 +258,108 @@ def custom_speaker_selection_func(last_speaker, groupchat):
                 return agent
 
 
+_suppressed = threading.local()
+_stream_lock = threading.Lock()
+
+
+class _ThreadAwareStream:
+    # Drops writes from threads inside suppress_output() so concurrent workers do not
+    # swap sys.stdout/sys.stderr out from under each other.
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, data):
+        if getattr(_suppressed, "depth", 0):
+            return len(data)
+        return self._stream.write(data)
+
+    def flush(self):
+        if not getattr(_suppressed, "depth", 0):
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
 @contextlib.contextmanager
 def suppress_output():
-    with open(os.devnull, 'w') as devnull:
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = devnull
-        sys.stderr = devnull
-        try:
-            yield
-        finally:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+    with _stream_lock:
+        if not isinstance(sys.stdout, _ThreadAwareStream):
+            sys.stdout = _ThreadAwareStream(sys.stdout)
+        if not isinstance(sys.stderr, _ThreadAwareStream):
+            sys.stderr = _ThreadAwareStream(sys.stderr)
+    _suppressed.depth = getattr(_suppressed, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _suppressed.depth -= 1
 
 
-def makerequest(group_chat_manager, user_proxy, agent, prompt):
+def makerequest(group_chat_manager, user_proxy, agent, prompt, on_delta=None):
     full_prompt = f"Next speaker: {agent.name}\n{prompt}"
-    logger.info(f"Prompt sent to {agent.name}: {full_prompt}")
+    logger.info("Prompt sent to %s: %s", agent.name, payload(full_prompt))
 
     MODEL_MAX_CONTEXT = 32768
-    MAX_COMPLETION_TOKENS = llm_config.get("max_tokens", 4096)
+    MAX_COMPLETION_TOKENS = get_llm_config().get("max_tokens", 4096)
     SAFETY_BUFFER = 8192 
     TOKEN_THRESHOLD = MODEL_MAX_CONTEXT - MAX_COMPLETION_TOKENS - SAFETY_BUFFER - 4096
 
     messages_to_send = group_chat_manager.groupchat.messages
-    current_messages_tokens = count_token(messages_to_send)
+    ledger = get_token_ledger(group_chat_manager.groupchat)
+    current_messages_tokens = ledger.sync(messages_to_send)
     current_prompt_tokens = count_token(full_prompt)
     current_tokens = current_messages_tokens + current_prompt_tokens
-    
-    while current_tokens > TOKEN_THRESHOLD:
-        if len(messages_to_send) > 1:
-            removed_message = messages_to_send.pop(0)
-            current_tokens = count_token(messages_to_send) + current_prompt_tokens
-            logger.warning(f"Message history too long; removed one old message. Current tokens: {current_tokens}, threshold: {TOKEN_THRESHOLD}")
-        else:
-            logger.error("Message history contains only one message but still exceeds token threshold, unable to trim further.")
-            break
-    for ag in group_chat_manager.groupchat.agents:
-        ag.chat_messages[group_chat_manager] = group_chat_manager.groupchat.messages
 
+    if current_tokens > TOKEN_THRESHOLD:
+        removed = ledger.trim(messages_to_send, TOKEN_THRESHOLD - current_prompt_tokens)
+        current_tokens = ledger.total + current_prompt_tokens
+        logger.warning("Message history too long; removed %d old messages. Current tokens: %d, threshold: %d", removed, current_tokens, TOKEN_THRESHOLD)
+        if current_tokens > TOKEN_THRESHOLD:
+            logger.error("Message history contains only one message but still exceeds token threshold, unable to trim further.")
     try:
-        with suppress_output():
-            response = user_proxy.initiate_chat(
-                group_chat_manager,
-                message=full_prompt,
-                max_turns=1,
-                clear_history=False
-            )
-        # print(response.chat_history)
-        original_response_text = response.chat_history[-1]["content"].strip()
-        logger.info(f"Raw response from {agent.name}: {original_response_text}")
+        with span(AGENT_STAGES.get(agent.name, agent.name), agent=agent.name, prompt_tokens=current_tokens) as stage_span:
+            if isinstance(group_chat_manager, DirectDispatcher):
+                original_response_text = group_chat_manager.request(agent, full_prompt, on_delta=on_delta).strip()
+            else:
+                # The GroupChatManager path cannot stream; on_delta is ignored and the
+                # caller prints the complete reply.
+                for ag in group_chat_manager.groupchat.agents:
+                    ag.chat_messages[group_chat_manager] = group_chat_manager.groupchat.messages
+                history_length = len(group_chat_manager.groupchat.messages)
+
+                def forget_failed_turn():
+                    # A retry resends the prompt, so drop whatever the failed turn appended.
+                    del group_chat_manager.groupchat.messages[history_length:]
+
+                def initiate():
+                    with suppress_output():
+                        return user_proxy.initiate_chat(
+                            group_chat_manager,
+                            message=full_prompt,
+                            max_turns=1,
+                            clear_history=False
+                        )
+
+                response = limiter_for_agent(agent).call(initiate, tokens=current_tokens, before_retry=forget_failed_turn)
+                # print(response.chat_history)
+                original_response_text = response.chat_history[-1]["content"].strip()
+            if stage_span.active:
+                stage_span.set(completion_tokens=count_token(original_response_text))
+        logger.info("Raw response from %s: %s", agent.name, payload(original_response_text))
         
         think_index = original_response_text.find("</think>")
         if think_index != -1:
             processed_response_text = original_response_text[think_index + len("</think>"):].strip()
         else:
             processed_response_text = original_response_text
-        logger.info(f"Processed response from {agent.name}: {processed_response_text}")
+        logger.debug("Processed response from %s: %s", agent.name, payload(processed_response_text))
         group_chat_manager.groupchat.messages[-1]["content"] = processed_response_text
         return processed_response_text
-    
+
+    except LLMUnavailableError:
+        raise
     except Exception as e:
-        logger.exception(f"Error while calling {agent.name}: %s", e)
+        logger.exception("Error while calling %s: %s", agent.name, e)
         return None
     
 
@@ -302,56 +383,5 @@ def is_necessary(necessity_score, asked_questions):
         return False
     
 
-def save_assessment_results(identifier, overall_score, symptom_level, updated_scores, csv_file="depression.csv", scale_name="PHQ-8"):
-    data = {
-        "identifier": identifier,
-        "classes": symptom_level,
-        "total": overall_score
-    }
-    score_values = {topic: details["score"] for topic, details in updated_scores.items()}
-    max_items = 8
-    for idx, (topic, score) in enumerate(score_values.items(), 1):
-        item_key = f"item{idx}"
-        data[item_key] = score
-    for i in range(1, max_items + 1):
-        item_key = f"item{i}"
-        if item_key not in data:
-            data[item_key] = 0 
-
-    if os.path.isfile(csv_file):
-        try:
-            df = pd.read_csv(csv_file, encoding='utf-8')
-            if identifier in df['identifier'].values:
-                index = df.index[df['identifier'] == identifier].tolist()[0]
-                for key, value in data.items():
-                    df.at[index, key] = value
-                logger.info(f"Updated evaluation results for {identifier}.")
-            else:
-                df = pd.concat([df, pd.DataFrame([data])], ignore_index=True)
-                logger.info(f"Appended evaluation results for {identifier}.")
-        except Exception as e:
-            logger.error(f"Error reading CSV file {csv_file}: {e}")
-            print("Error reading CSV file; please check the logs.")
-            return
-    else:
-        columns = ["identifier", "total", "classes"] + [f"item{i}" for i in range(1, max_items + 1)]
-        df = pd.DataFrame([data], columns=columns)
-        logger.info(f"A new CSV file {csv_file} has been created and the evaluation results have been saved.")
-    try:
-        df.to_csv(csv_file, index=False, encoding='utf-8')
-        logger.info(f"Evaluation results saved to {csv_file}")
-    except Exception as e:
-        logger.error(f"Error saving CSV file {csv_file}: {e}")
-        print("Error saving CSV file; please check the logs.")
-
 def is_file_already_evaluated(identifier, csv_file_path):
-    if not os.path.isfile(csv_file_path):
-        return False  
-    try:
-        df = pd.read_csv(csv_file_path, encoding='utf-8')
-        normalized_identifiers = df['identifier'].astype(str).str.strip()
-        return str(identifier).strip() in normalized_identifiers.values
-    except Exception as e:
-        logger.error(f"Error checking CSV file {csv_file_path}: {e}")
-        return False  
-
+    return ResultsStore.for_csv(csv_file_path).is_evaluated(identifier)
@@ -0,0 +1,228 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+lease_seconds = float(os.getenv("WORK_QUEUE_LEASE", "600"))
+max_attempts = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+
+TASK_STATES = ("pending", "leased", "done", "failed")
+
+
+class LeaseLostError(RuntimeError):
+    # Raised by LeaseKeeper.check once the lease is gone: another worker may already be
+    # running the task, so this one stops without saving a result or a checkpoint.
+    pass
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    # SQLite-backed lease queue over participant files, shared by threads (one connection
+    # each) and by processes (WAL mode plus a busy timeout). A claim leases one task to a
+    # worker until lease_expires; the worker extends the lease with heartbeats while it
+    # runs. A lease that lapses (the worker crashed or hung) is returned to pending on the
+    # next claim, until the task has used up max_attempts.
+    def __init__(self, path, lease=lease_seconds, max_attempts=max_attempts):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "identifier TEXT PRIMARY KEY, path TEXT NOT NULL, state TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_expires REAL, last_error TEXT, "
+            "updated REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, identifier)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, statements):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can never read the
+        # same pending row and both lease it.
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, tasks, done=()):
+        # tasks: (identifier, path) pairs. Existing rows are left alone, so every worker can
+        # enqueue the same dataset on start-up; identifiers in `done` are already evaluated.
+        now = time.time()
+        done = set(done)
+        rows = [(identifier, path, "done" if identifier in done else "pending", now) for identifier, path in tasks]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO tasks (identifier, path, state, updated) VALUES (?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+        added = self._transaction(insert)
+        if added:
+            logger.info("Enqueued %s new tasks in %s.", added, self.path)
+        return added
+
+    def _requeue_expired(self, conn, now):
+        expired = conn.execute(
+            "SELECT identifier, worker, attempts FROM tasks WHERE state = 'leased' AND lease_expires < ?", (now,)
+        ).fetchall()
+        for identifier, worker, attempts in expired:
+            state = "failed" if attempts >= self.max_attempts else "pending"
+            conn.execute(
+                "UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, last_error = ?, updated = ? WHERE identifier = ?",
+                (state, f"lease held by {worker} expired", now, identifier)
+            )
+            logger.warning("Lease on %s held by %s expired; task is now %s (attempt %s/%s).", identifier, worker, state, attempts, self.max_attempts)
+
+    def claim(self, worker):
+        now = time.time()
+
+        def take(conn):
+            self._requeue_expired(conn, now)
+            row = conn.execute("SELECT identifier, path, attempts FROM tasks WHERE state = 'pending' ORDER BY identifier LIMIT 1").fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, updated = ? WHERE identifier = ?",
+                (worker, now + self.lease, now, row[0])
+            )
+            return row[0], row[1], row[2] + 1
+
+        return self._transaction(take)
+
+    def heartbeat(self, identifier, worker):
+        # False once the lease is lost (it expired and another worker may hold the task).
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE tasks SET lease_expires = ?, updated = ? WHERE identifier = ? AND worker = ? AND state = 'leased'",
+            (now + self.lease, now, identifier, worker)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, identifier, worker):
+        cursor = self._connection().execute(
+            "UPDATE tasks SET state = 'done', worker = NULL, lease_expires = NULL, last_error = NULL, updated = ? "
+            "WHERE identifier = ? AND worker = ? AND state = 'leased'",
+            (time.time(), identifier, worker)
+        )
+        if cursor.rowcount != 1:
+            logger.warning("Completed %s after its lease was lost; the result is kept but another worker may rerun it.", identifier)
+        return cursor.rowcount == 1
+
+    def fail(self, identifier, worker, error):
+        now = time.time()
+
+        def release(conn):
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE identifier = ? AND worker = ? AND state = 'leased'", (identifier, worker)
+            ).fetchone()
+            if row is None:
+                return None
+            state = "failed" if row[0] >= self.max_attempts else "pending"
+            conn.execute(
+                "UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, last_error = ?, updated = ? WHERE identifier = ?",
+                (state, str(error)[:500], now, identifier)
+            )
+            return state
+
+        state = self._transaction(release)
+        if state is not None:
+            logger.warning("Task %s failed on %s: %s; task is now %s.", identifier, worker, error, state)
+        return state
+
+    def retry_failed(self):
+        cursor = self._connection().execute(
+            "UPDATE tasks SET state = 'pending', attempts = 0, updated = ? WHERE state = 'failed'", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def status(self):
+        conn = self._connection()
+        counts = dict.fromkeys(TASK_STATES, 0)
+        counts.update(conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+        leased = conn.execute(
+            "SELECT identifier, worker, lease_expires, attempts FROM tasks WHERE state = 'leased' ORDER BY identifier"
+        ).fetchall()
+        failed = conn.execute(
+            "SELECT identifier, attempts, last_error FROM tasks WHERE state = 'failed' ORDER BY identifier"
+        ).fetchall()
+        return counts, leased, failed
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LeaseKeeper:
+    # Background heartbeat for one claimed task; renews the lease every third of its
+    # length until stopped. `lost` is set if the queue refuses a renewal, and check()
+    # turns it into LeaseLostError at the assessment's topic and checkpoint boundaries.
+    def __init__(self, queue, identifier, worker):
+        self.queue = queue
+        self.identifier = identifier
+        self.worker = worker
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{identifier}", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.queue.lease / 3):
+                try:
+                    if not self.queue.heartbeat(self.identifier, self.worker):
+                        self.lost = True
+                        logger.warning("Lost the lease on %s; another worker may pick it up.", self.identifier)
+                        return
+                except sqlite3.Error as e:
+                    logger.warning("Heartbeat for %s failed: %s", self.identifier, e)
+        finally:
+            self.queue.close()
+
+    def check(self):
+        if self.lost:
+            raise LeaseLostError(f"lease on {self.identifier} held by {self.worker} was lost")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def format_queue_status(queue):
+    counts, leased, failed = queue.status()
+    total = sum(counts.values())
+    lines = [f"Queue {queue.path}: {total} tasks, " + ", ".join(f"{state} {counts[state]}" for state in TASK_STATES)]
+    now = time.time()
+    for identifier, worker, lease_expires, attempts in leased:
+        lines.append(f"  leased  {identifier} by {worker}, attempt {attempts}, lease {lease_expires - now:+.0f}s")
+    for identifier, attempts, last_error in failed:
+        lines.append(f"  failed  {identifier} after {attempts} attempts: {last_error}")
+    return "\n".join(lines)